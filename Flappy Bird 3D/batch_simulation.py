@@ -0,0 +1,144 @@
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, GRAVITY, BIRD_JUMP, OBSTACLE_GAP,
+                        OBSTACLE_SPEED, OBSTACLE_WIDTH, OBSTACLE_INTERVAL, FLOOR_HEIGHT,
+                        DINO_SIZE, TICK_RATE, Bird, Obstacle)
+
+class BatchWorld:
+    def __init__(self, count, seed=None):
+        self.count = count
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        
+        bird = Bird()
+        self.bird_x = bird.x
+        self.bird_size = bird.size
+        self.mask_x = int(bird.x - bird.size//2)
+        self.floor_y = SCREEN_HEIGHT - FLOOR_HEIGHT - bird.size
+        
+        self.y = np.full(self.count, bird.y, dtype=np.float64)
+        self.velocity = np.full(self.count, bird.velocity, dtype=np.float64)
+        self.alive = np.ones(self.count, dtype=bool)
+        self.score = np.zeros(self.count, dtype=np.int64)
+        self.ticks = np.zeros(self.count, dtype=np.int64)
+        self.tick = 0
+        
+        self.dino_width, self.dino_height = DINO_SIZE
+        
+        lifetime = math.ceil((SCREEN_WIDTH + OBSTACLE_WIDTH) / (OBSTACLE_SPEED / TICK_RATE)) + 1
+        capacity = lifetime // OBSTACLE_INTERVAL + 2
+        self.table_min = -self.bird_size
+        table_size = SCREEN_HEIGHT - self.table_min + 1
+        
+        self.obstacle_x = np.zeros(capacity, dtype=np.float64)
+        self.obstacle_height = np.zeros(capacity, dtype=np.int64)
+        self.obstacle_live = np.zeros(capacity, dtype=bool)
+        self.obstacle_passed = np.zeros(capacity, dtype=bool)
+        self.obstacle_blocked = np.zeros((capacity, table_size), dtype=bool)
+        self.last_obstacle = -OBSTACLE_INTERVAL
+        self.scratch = Obstacle(SCREEN_WIDTH, random.Random(0))
+    
+    def spawn(self):
+        obstacle = self.scratch
+        obstacle.reset(SCREEN_WIDTH, self.rng)
+        slot = int(np.flatnonzero(~self.obstacle_live)[0])
+        
+        cells = list(obstacle.top_dinos)
+        bottom_y_start = obstacle.height + OBSTACLE_GAP
+        cells.extend(bottom_y_start + y_offset for y_offset in obstacle.bottom_dinos)
+        
+        blocked = self.obstacle_blocked[slot]
+        blocked[:] = False
+        for y_pos in cells:
+            start = max(y_pos - self.bird_size + 1, self.table_min)
+            end = min(y_pos + self.dino_height - 1, SCREEN_HEIGHT)
+            blocked[start - self.table_min:end - self.table_min + 1] = True
+        
+        self.obstacle_x[slot] = obstacle.x
+        self.obstacle_height[slot] = obstacle.height
+        self.obstacle_live[slot] = True
+        self.obstacle_passed[slot] = False
+    
+    def step(self, jumps=None):
+        alive = self.alive
+        if not alive.any():
+            return alive
+        
+        if jumps is not None:
+            self.velocity[alive & jumps] = BIRD_JUMP
+        
+        if self.tick - self.last_obstacle >= OBSTACLE_INTERVAL:
+            self.spawn()
+            self.last_obstacle = self.tick
+        
+        velocity = self.velocity + GRAVITY / TICK_RATE
+        y = self.y + velocity / TICK_RATE
+        grounded = y > self.floor_y
+        y[grounded] = self.floor_y
+        velocity[grounded] = 0
+        self.y[alive] = y[alive]
+        self.velocity[alive] = velocity[alive]
+        
+        live = self.obstacle_live
+        self.obstacle_x[live] -= OBSTACLE_SPEED / TICK_RATE
+        x = self.obstacle_x
+        cell_x = np.trunc(x)
+        
+        overlapping = np.flatnonzero(live & (cell_x < self.mask_x + self.bird_size)
+                                     & (cell_x + self.dino_width > self.mask_x))
+        if overlapping.size:
+            mask_y = (self.y - self.bird_size//2).astype(np.int64)
+            index = np.clip(mask_y, self.table_min, SCREEN_HEIGHT) - self.table_min
+            hit = self.obstacle_blocked[overlapping][:, index].any(axis=0)
+        else:
+            hit = None
+        
+        passing = live & ~self.obstacle_passed & (x + OBSTACLE_WIDTH < self.bird_x)
+        passes = int(passing.sum())
+        if passes:
+            self.obstacle_passed |= passing
+            self.score[alive] += passes
+        
+        self.ticks[alive] += 1
+        if hit is not None:
+            self.alive = alive & ~hit
+        
+        self.obstacle_live &= x > -OBSTACLE_WIDTH
+        self.tick += 1
+        return self.alive
+    
+    def run(self, policy=None, max_ticks=None):
+        while self.alive.any() and (max_ticks is None or self.tick < max_ticks):
+            self.step(policy(self) if policy is not None else None)
+        return self.score
+
+def main():
+    parser = argparse.ArgumentParser(description='Step many birds through one obstacle course with NumPy.')
+    parser.add_argument('--birds', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jump-rate', type=float, default=0.07)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(args.seed)
+    batch = BatchWorld(args.birds, args.seed)
+    
+    start = time.perf_counter()
+    batch.run(lambda world: rng.random(world.count) < args.jump_rate, args.ticks)
+    elapsed = time.perf_counter() - start
+    
+    bird_ticks = int(batch.ticks.sum())
+    print(f'{args.birds} birds, {batch.tick} ticks, {bird_ticks} bird-ticks in {elapsed:.3f}s')
+    print(f'{bird_ticks / elapsed:,.0f} bird-ticks/s, best score {batch.score.max()}, '
+          f'mean score {batch.score.mean():.2f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import flappy_bird
+from collision import RectCollider
+from profiler import FrameProfiler
+from simulation import TIMESTEP
+
+FLAP_HEIGHT = 300
+TOGGLE_INTERVAL = 31
+DENSE_OBSTACLE_INTERVAL = 30
+STARTUP_SCRIPT = '''
+import json
+import time
+started = time.perf_counter()
+import flappy_bird
+imported = time.perf_counter()
+game = flappy_bird.Game(title_screen=True)
+game.frame(0.0, [])
+first_frame = time.perf_counter()
+while game.background is None:
+    time.sleep(0.001)
+    game.frame(0.0, [])
+ready = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'init_ms': flappy_bird.startup['init_ms'],
+    'first_frame_ms': (first_frame - started) * 1000,
+    'background_ms': (ready - started) * 1000,
+}))
+'''
+
+class GhostCollider(RectCollider):
+    def hit(self, bird, rect, obstacle):
+        return False
+
+class AlwaysCollider(RectCollider):
+    def collide(self, bird, obstacles):
+        return True
+
+def key(code):
+    return pygame.event.Event(pygame.KEYDOWN, key=code)
+
+class Scenario:
+    collider = GhostCollider
+    obstacle_interval = flappy_bird.OBSTACLE_INTERVAL
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def setup(self, game):
+        pass
+    
+    def events(self, game, frame):
+        if not game.world.game_over and game.world.bird.y > FLAP_HEIGHT:
+            return [key(pygame.K_SPACE)]
+        return []
+
+class SteadyNight(Scenario):
+    def setup(self, game):
+        game.target_mode = flappy_bird.NIGHT_MODE
+        game.mode_transition = 1.0
+
+class Toggling(Scenario):
+    def events(self, game, frame):
+        events = super().events(game, frame)
+        if frame % TOGGLE_INTERVAL == 0:
+            events.append(key(pygame.K_n))
+        return events
+
+class DenseObstacles(Scenario):
+    obstacle_interval = DENSE_OBSTACLE_INTERVAL
+
+class GameOverScreen(Scenario):
+    collider = AlwaysCollider
+
+class RapidRestarts(Scenario):
+    collider = AlwaysCollider
+    
+    def events(self, game, frame):
+        if game.world.game_over:
+            return [key(pygame.K_r)]
+        return []
+
+SCENARIOS = {
+    'steady_day': Scenario('steady_day'),
+    'steady_night': SteadyNight('steady_night'),
+    'toggle': Toggling('toggle'),
+    'dense_obstacles': DenseObstacles('dense_obstacles'),
+    'game_over': GameOverScreen('game_over'),
+    'rapid_restarts': RapidRestarts('rapid_restarts'),
+}
+
+def run_scenario(scenario, frames, warmup, seed, quality_tier=0):
+    random.seed(seed)
+    game = flappy_bird.Game(seed, collider=scenario.collider(), obstacle_interval=scenario.obstacle_interval,
+                            adaptive_quality=False, quality_tier=quality_tier)
+    scenario.setup(game)
+    
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            game.profiler = FrameProfiler(1000 / flappy_bird.FPS, window=frames, session_limit=frames)
+        pygame.event.pump()
+        game.frame(TIMESTEP, scenario.events(game, frame))
+    
+    totals = [record[0] for record in game.profiler.session]
+    result = game.profiler.summary()
+    result['mean_ms'] = sum(totals) / len(totals) / 1e6
+    return result
+
+def run(names, frames, warmup, seed, quality_tier=0):
+    results = {}
+    for name in names:
+        results[name] = run_scenario(SCENARIOS[name], frames, warmup, seed, quality_tier)
+    return results
+
+def measure_startup(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append(json.loads(output.stdout.splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+def report(results):
+    print(f"{'scenario':<16} {'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  slowest stages")
+    for name, result in results.items():
+        stages = sorted(result['stages_ms'].items(), key=lambda item: item[1], reverse=True)[:3]
+        breakdown = '  '.join(f'{stage} {ms:.2f}' for stage, ms in stages)
+        print(f"{name:<16} {result['mean_ms']:7.2f} {result['p50_ms']:7.2f} {result['p95_ms']:7.2f} "
+              f"{result['p99_ms']:7.2f} {result['max_ms']:7.2f}  {breakdown}")
+
+def compare(results, baseline, tolerance, metrics=('mean_ms', 'p95_ms')):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in metrics:
+            old = baseline[name][metric]
+            new = result[metric]
+            change = (new - old) / old if old else 0.0
+            status = 'REGRESSION' if change > tolerance else 'ok'
+            print(f'{name:<16} {metric:<8} {old:7.2f} -> {new:7.2f} ms ({change:+.1%}) {status}')
+            if change > tolerance:
+                regressions.append((name, metric, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Run scripted scenarios through the game headlessly and time each frame.')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario', help=f"any of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to a JSON baseline')
+    parser.add_argument('--compare', help='compare against a JSON baseline and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--quality', default=flappy_bird.QUALITY_TIERS[0]['name'],
+                        choices=[tier['name'] for tier in flappy_bird.QUALITY_TIERS])
+    parser.add_argument('--startup', type=int, default=0, metavar='RUNS',
+                        help='also time import and first frame in this many fresh interpreters')
+    args = parser.parse_args()
+    
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    quality_tier = [tier['name'] for tier in flappy_bird.QUALITY_TIERS].index(args.quality)
+    results = run(names, args.frames, args.warmup, args.seed, quality_tier)
+    report(results)
+    
+    startup = None
+    if args.startup:
+        startup = measure_startup(args.startup)
+        print('startup ' + '  '.join(f'{key[:-3]} {ms:.1f} ms' for key, ms in startup.items()))
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'machine': platform.machine(),
+                'frames': args.frames,
+                'warmup': args.warmup,
+                'seed': args.seed,
+                'quality': args.quality,
+                'scenarios': results,
+                'startup': startup,
+            }, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.tolerance:.0%}')
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
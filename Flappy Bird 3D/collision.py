@@ -0,0 +1,68 @@
+def rects_collide(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    if not (aw and ah and bw and bh):
+        return False
+    return ax < bx + bw and ay < by + bh and ax + aw > bx and ay + ah > by
+
+def hitboxes_collide(rect, x, hitboxes):
+    for hx, hy, hw, hh in hitboxes:
+        if rects_collide(rect, (x + hx, hy, hw, hh)):
+            return True
+    return False
+
+class RectCollider:
+    def bounds(self, bird):
+        return bird.get_mask()
+    
+    def candidates(self, rect, obstacles):
+        left = rect[0]
+        right = rect[0] + rect[2]
+        for obstacle in obstacles:
+            x = int(obstacle.x)
+            if x >= right:
+                break
+            if x + obstacle.dino_size[0] > left:
+                yield obstacle
+    
+    def hit(self, bird, rect, obstacle):
+        return hitboxes_collide(rect, int(obstacle.x), obstacle.hitboxes)
+    
+    def collide(self, bird, obstacles):
+        rect = self.bounds(bird)
+        for obstacle in self.candidates(rect, obstacles):
+            if self.hit(bird, rect, obstacle):
+                return True
+        return False
+
+class MaskCollider(RectCollider):
+    def __init__(self, bird_image, dino_image, angle_step=1):
+        import pygame
+        
+        self.pygame = pygame
+        self.bird_image = bird_image
+        self.angle_step = angle_step
+        self.bird_masks = {}
+        self.dino_mask = pygame.mask.from_surface(dino_image)
+    
+    def bird_mask(self, rotation):
+        key = int(round(rotation / self.angle_step))
+        if key not in self.bird_masks:
+            rotated = self.pygame.transform.rotate(self.bird_image, key * self.angle_step)
+            self.bird_masks[key] = (self.pygame.mask.from_surface(rotated), rotated.get_rect())
+        return self.bird_masks[key]
+    
+    def bounds(self, bird):
+        mask, rect = self.bird_mask(bird.rotation)
+        rect = rect.copy()
+        rect.center = (bird.x, bird.y)
+        return tuple(rect)
+    
+    def hit(self, bird, rect, obstacle):
+        mask = self.bird_mask(bird.rotation)[0]
+        x = int(obstacle.x)
+        for hx, hy, hw, hh in obstacle.cells:
+            if rects_collide(rect, (x + hx, hy, hw, hh)):
+                if self.dino_mask.overlap(mask, (rect[0] - x - hx, rect[1] - hy)):
+                    return True
+        return False
@@ -0,0 +1,116 @@
+import argparse
+import importlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from simulation import SCREEN_HEIGHT, OBSTACLE_GAP, TICK_RATE, World
+
+MAX_TICKS = 60 * TICK_RATE
+CHUNK_SIZE = 16
+
+def idle(seed):
+    return lambda world: False
+
+def random_flaps(seed, rate=0.07):
+    rng = random.Random(seed)
+    return lambda world: rng.random() < rate
+
+def heuristic(seed, margin=20):
+    def policy(world):
+        bird = world.bird
+        target = SCREEN_HEIGHT // 2
+        for obstacle in world.obstacles:
+            if obstacle.x + obstacle.width >= bird.x - bird.size:
+                target = obstacle.height + OBSTACLE_GAP - margin
+                break
+        return bird.velocity >= 0 and bird.y + bird.size > target
+    return policy
+
+POLICIES = {
+    'idle': idle,
+    'random': random_flaps,
+    'heuristic': heuristic,
+}
+
+def resolve_policy(spec):
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+class Results:
+    def __init__(self, count, name=None):
+        self.count = count
+        self.memory = shared_memory.SharedMemory(name, create=name is None, size=max(1, count * 16))
+        self.scores = np.ndarray(count, dtype=np.int64, buffer=self.memory.buf)
+        self.ticks = np.ndarray(count, dtype=np.int64, buffer=self.memory.buf, offset=count * 8)
+    
+    def close(self):
+        del self.scores, self.ticks
+        self.memory.close()
+    
+    def unlink(self):
+        self.close()
+        self.memory.unlink()
+
+worker_results = None
+
+def attach(name, count):
+    global worker_results
+    worker_results = Results(count, name)
+
+def run_episode(policy, seed, max_ticks=MAX_TICKS):
+    world = World(seed)
+    step = world.step
+    while world.tick < max_ticks and step(policy(world)):
+        pass
+    return world
+
+def run_chunk(policy_spec, base_seed, start, stop, max_ticks):
+    make_policy = resolve_policy(policy_spec)
+    for index in range(start, stop):
+        seed = base_seed + index
+        world = run_episode(make_policy(seed), seed, max_ticks)
+        worker_results.scores[index] = world.score
+        worker_results.ticks[index] = world.tick
+    return stop - start
+
+def evaluate(episodes, policy='heuristic', seed=0, max_ticks=MAX_TICKS, workers=None, chunk_size=CHUNK_SIZE):
+    results = Results(episodes)
+    try:
+        with ProcessPoolExecutor(workers, initializer=attach, initargs=(results.memory.name, episodes)) as pool:
+            chunks = [pool.submit(run_chunk, policy, seed, start, min(start + chunk_size, episodes), max_ticks)
+                      for start in range(0, episodes, chunk_size)]
+            for chunk in chunks:
+                chunk.result()
+        return results.scores.copy(), results.ticks.copy()
+    finally:
+        results.unlink()
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a policy over many headless episodes in parallel.')
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--policy', default='heuristic',
+                        help=f"one of {', '.join(POLICIES)} or module:factory taking an episode seed")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    scores, ticks = evaluate(args.episodes, args.policy, args.seed, args.max_ticks, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    
+    print(f'{args.episodes} episodes on {args.workers} workers in {elapsed:.3f}s: '
+          f'{args.episodes / elapsed:,.1f} episodes/s, {ticks.sum() / elapsed:,.0f} ticks/s')
+    print(f'score mean {scores.mean():.2f} max {scores.max()}, '
+          f'survival mean {ticks.mean() / TICK_RATE:.1f}s, {np.count_nonzero(ticks >= args.max_ticks)} hit the step budget')
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,87 @@
-import pygame
+import time
+
+STARTED = time.perf_counter()
+
 import sys
 import random
 import os
-from pygame import gfxdraw
-import time
 import math
+import threading
+import queue
+import traceback
+import weakref
+from collections import OrderedDict, deque
+from simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, OBSTACLE_GAP, FLOOR_HEIGHT, BIRD_SIZE,
+                        DINO_SIZE, BIRD_MIN_ROTATION, BIRD_MAX_ROTATION, TIMESTEP, OBSTACLE_INTERVAL,
+                        OBSTACLE_SPEED, TICK_RATE, World)
+from collision import MaskCollider
+from profiler import FrameProfiler
+from replay import Recorder
+from telemetry import TELEMETRY_DIR, FrameHistogram, TelemetryWriter
 
-pygame.init()
-
-SCREEN_WIDTH = 400
-SCREEN_HEIGHT = 600
-GRAVITY = 0.25
-BIRD_JUMP = -5
-OBSTACLE_GAP = 150
-OBSTACLE_FREQUENCY = 1500
-FLOOR_HEIGHT = 100
+SHADOW_ALPHA = 100
+BIRD_ROTATION_STEP = 1
+PIXEL_COLLISION = False
+DIRTY_RECTS = False
+DIRTY_AREA_THRESHOLD = 0.75
+DIRTY_MERGE_WASTE = 0.25
+TEXT_CACHE_SIZE = 128
+CLOUD_COUNT = 10
+CLOUD_SIZE_STEP = 0.05
+CLOUD_ALPHA_STEP = 8
+CELESTIAL_ALPHA_STEP = 8
+FLOOR_TILE_WIDTH = 480
+ATLAS_WIDTH = 512
+ATLAS_PADDING = 4
+CHUNK_WIDTH = SCREEN_WIDTH
+CHUNK_CACHE_SIZE = 6
+CHUNK_PREFETCH = 1
+CHUNK_COLORKEY = (255, 0, 255)
+MOUNTAINS_PER_CHUNK = 6
+TREES_PER_CHUNK = 10
+MOUNTAIN_LAYER_HEIGHT = 280
+TREE_LAYER_HEIGHT = 80
+SCROLL_TOP = SCREEN_HEIGHT - FLOOR_HEIGHT - max(MOUNTAIN_LAYER_HEIGHT, TREE_LAYER_HEIGHT)
+MOUNTAIN_PARALLAX = 0.25
+TREE_PARALLAX = 0.6
+STAR_COUNT = 100
+TWINKLE_CHANCE = 0.01
+PROFILE_DUMP_PATH = 'frame_profile.json'
+WINDOW_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)
+RESIZABLE_WINDOW = True
 FPS = 60
+MAX_FRAME_TIME = 0.25
+REGENERATE_BACKGROUND = False
+TITLE_SCREEN = True
+ADAPTIVE_QUALITY = True
+QUALITY_WINDOW = 90
+QUALITY_COOLDOWN = 120
+QUALITY_STABLE_FRAMES = 1800
+QUALITY_DOWN_THRESHOLD = 1.0
+QUALITY_UP_THRESHOLD = 0.6
 LAST_FRAME_TIME = time.time()
 
 DAY_MODE = 0
 NIGHT_MODE = 1
-MODE_TRANSITION_SPEED = 0.05
+MODE_TRANSITION_SPEED = 3.0
+
+PLAYING = 0
+GAME_OVER = 1
+RESTARTING = 2
+TITLE = 3
+
+LAYER_MOUNTAINS = 0
+LAYER_TREES = 1
+LAYER_CLOUDS = 2
+LAYER_OBSTACLE_SHADOWS = 3
+LAYER_OBSTACLES = 4
+LAYER_FLOOR = 5
+LAYER_BIRD_SHADOW = 6
+LAYER_BIRD = 7
+LAYER_HUD = 8
+LAYER_OVERLAY = 9
+WORLD_LAYERS = range(LAYER_MOUNTAINS, LAYER_HUD)
+SCREEN_LAYERS = range(LAYER_HUD, LAYER_OVERLAY + 1)
 
 DAY_SKY = (135, 206, 235)
 NIGHT_SKY = (25, 25, 50)
@@ -29,11 +90,6 @@ NIGHT_GROUND = (50, 25, 0)
 DAY_GRASS = (34, 139, 34)
 NIGHT_GRASS = (20, 70, 20)
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('Flappy Bird 3D')
-clock = pygame.time.Clock()
-font = pygame.font.SysFont('Arial', 30)
-
 SKY_BLUE = (135, 206, 235)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -41,129 +97,870 @@ GREEN = (0, 128, 0)
 BROWN = (139, 69, 19)
 LIGHT_GREEN = (34, 139, 34)
 
-class Bird:
-    def __init__(self):
-        self.x = SCREEN_WIDTH // 3
-        self.y = SCREEN_HEIGHT // 2
-        self.velocity = 0
-        self.size = 20
-        self.image = pygame.image.load(os.path.join('assets', 'bird.png'))
-        self.image = pygame.transform.scale(self.image, (self.size * 2, self.size * 2))
-        self.rect = self.image.get_rect(center=(self.x, self.y))
-        self.rotation = 0
-        self.shadow_offset = 8
+QUALITY_TIERS = (
+    {'name': 'high', 'shadows': True, 'twinkle': True, 'glows': True, 'cloud_detail': True,
+     'mountain_step': 3, 'rock_textures': True, 'scale': 1.0},
+    {'name': 'medium', 'shadows': True, 'twinkle': False, 'glows': False, 'cloud_detail': True,
+     'mountain_step': 3, 'rock_textures': True, 'scale': 1.0},
+    {'name': 'low', 'shadows': False, 'twinkle': False, 'glows': False, 'cloud_detail': False,
+     'mountain_step': 6, 'rock_textures': False, 'scale': 1.0},
+    {'name': 'lowest', 'shadows': False, 'twinkle': False, 'glows': False, 'cloud_detail': False,
+     'mountain_step': 6, 'rock_textures': False, 'scale': 0.5},
+)
+quality = QUALITY_TIERS[0]
+
+pygame = None
+np = None
+screen = None
+frame = None
+view = None
+hud = None
+display_scale = 1.0
+render_scale = 1.0
+native_scale = weakref.WeakKeyDictionary()
+rescaled = weakref.WeakKeyDictionary()
+clock = None
+font = None
+hint_font = None
+fps_font = None
+profiler_font = None
+startup = {}
+
+def init(headless=False, size=WINDOW_SIZE):
+    global pygame, np, clock, font, hint_font, fps_font, profiler_font
+    if screen is not None:
+        return screen
     
-    def draw(self):
-        shadow_image = pygame.transform.rotate(self.image, self.rotation)
-        shadow_image.set_alpha(100)
-        shadow_rect = shadow_image.get_rect(center=(self.x + self.shadow_offset, self.y + self.shadow_offset))
-        screen.blit(shadow_image, shadow_rect)
-        
-        rotated_image = pygame.transform.rotate(self.image, self.rotation)
-        self.rect = rotated_image.get_rect(center=(self.x, self.y))
-        screen.blit(rotated_image, self.rect)
+    started = time.perf_counter()
+    if headless:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import numpy as np
     
-    def update(self):
-        self.velocity += GRAVITY
-        self.y += self.velocity
+    pygame.display.init()
+    pygame.font.init()
+    set_window(size)
+    pygame.display.set_caption('Flappy Bird 3D')
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont('Arial', 30)
+    hint_font = pygame.font.SysFont('Arial', 18)
+    fps_font = pygame.font.SysFont('Arial', 20)
+    profiler_font = pygame.font.SysFont('Arial', 14)
+    startup['init_ms'] = (time.perf_counter() - started) * 1000
+    return screen
+
+def set_window(size):
+    global screen, frame, view, hud, display_scale
+    screen = pygame.display.set_mode(size, pygame.RESIZABLE if RESIZABLE_WINDOW else 0)
+    width, height = screen.get_size()
+    display_scale = min(width / SCREEN_WIDTH, height / SCREEN_HEIGHT)
+    
+    if (width, height) == (SCREEN_WIDTH, SCREEN_HEIGHT):
+        frame = view = hud = screen
+        return screen
+    
+    rect = pygame.Rect(0, 0, round(SCREEN_WIDTH * display_scale), round(SCREEN_HEIGHT * display_scale))
+    rect.center = (width // 2, height // 2)
+    screen.fill(BLACK)
+    frame = view = screen.subsurface(rect)
+    hud = frame if display_scale == 1 else ScaledView(display_scale, frame)
+    return screen
+
+def scaled_size(size, scale):
+    return (max(1, math.ceil(size[0] * scale)), max(1, math.ceil(size[1] * scale)))
+
+def at_render_scale(surface):
+    scale = native_scale.get(surface, 1.0)
+    if scale == render_scale:
+        return surface
+    scaled = rescaled.get(surface)
+    if scaled is None or native_scale[scaled] != render_scale:
+        width, height = surface.get_size()
+        scaled = pygame.transform.scale(surface, (max(1, round(width * render_scale / scale)),
+                                                  max(1, round(height * render_scale / scale))))
+        colorkey = surface.get_colorkey()
+        if colorkey is not None:
+            scaled.set_colorkey(colorkey, pygame.RLEACCEL)
+        native_scale[scaled] = render_scale
+        rescaled[surface] = scaled
+    scaled.set_alpha(surface.get_alpha())
+    return scaled
+
+def scale_points(points, dx, dy, scale):
+    return [((x + dx) * scale, (y + dy) * scale) for x, y in points]
+
+def blend_rows(day, night, mode_transition):
+    return (day * (1 - mode_transition) + night * mode_transition).astype(np.int64)
+
+def fill_rows(surface, colors, scale=1.0):
+    rows = np.minimum((np.arange(surface.get_height()) / scale).astype(np.int64), len(colors) - 1)
+    pixels = pygame.surfarray.pixels3d(surface)
+    pixels[:] = colors[rows][None, :, :]
+    del pixels
+
+def sky_rows(mode_transition):
+    i = np.arange(SCREEN_HEIGHT - FLOOR_HEIGHT)
+    day = np.stack([np.full_like(i, 135), np.full_like(i, 206), 235 - (i * 0.2).astype(np.int64)], axis=1)
+    night = np.stack([np.full_like(i, 25), np.full_like(i, 25),
+                      np.maximum(0, 50 - (i * 0.15).astype(np.int64))], axis=1)
+    return blend_rows(day, night, mode_transition)
+
+def floor_rows(mode_transition):
+    y = np.arange(FLOOR_HEIGHT)
+    day_shade = 139 - (y * 0.3).astype(np.int64)
+    night_shade = 50 - (y * 0.2).astype(np.int64)
+    day = np.stack([day_shade, day_shade // 2, day_shade // 3], axis=1)
+    night = np.stack([night_shade, night_shade // 3, night_shade // 6], axis=1)
+    return blend_rows(day, night, mode_transition)
+
+def mountain_band_colors(ratio, mode_transition):
+    high = ratio > 0.7
+    day = np.where(high[:, None],
+                   np.stack([139 - (ratio * 30).astype(np.int64), 69 - (ratio * 20).astype(np.int64),
+                             np.full(ratio.shape, 19)], axis=1),
+                   np.stack([(30 + ratio * 70).astype(np.int64), (120 + (1 - ratio) * 80).astype(np.int64),
+                             np.full(ratio.shape, 30)], axis=1))
+    night = np.where(high[:, None],
+                     np.stack([50 - (ratio * 15).astype(np.int64), 50 - (ratio * 25).astype(np.int64),
+                               70 - (ratio * 30).astype(np.int64)], axis=1),
+                     np.stack([30 + (ratio * 20).astype(np.int64), 40 + (ratio * 10).astype(np.int64),
+                               np.full(ratio.shape, 60)], axis=1))
+    return blend_rows(day, night, mode_transition)
+
+def fill_mountain_bands(surface, detail, height, step, colors, dx, dy, scale=1.0):
+    xs = np.array([x for x, y in detail], dtype=np.float64) + dx
+    ys = np.array([y for x, y in detail], dtype=np.float64) + dy
+    base = SCREEN_HEIGHT - FLOOR_HEIGHT + dy
+    bands = np.arange(0, height, step)
+    above = ys[None, :] <= (base - bands)[:, None]
+    filled = above.sum(axis=1) >= 2
+    first = xs[above.argmax(axis=1)].astype(np.int64)
+    last = xs[len(xs) - 1 - above[:, ::-1].argmax(axis=1)].astype(np.int64)
+    
+    width, surface_height = surface.get_size()
+    top = max(0, int((base - height + 1) * scale))
+    bottom = min(surface_height, math.ceil((base + 1) * scale))
+    left = max(0, int(xs.min() * scale))
+    right = min(width, math.ceil((xs.max() + 1) * scale))
+    if top >= bottom or left >= right:
+        return
+    
+    band = base - (np.arange(top, bottom) / scale).astype(np.int64)
+    index = np.clip(band // step, 0, len(bands) - 1)
+    rows = (band >= 0) & (band < height) & (band % step == 0) & filled[index]
+    columns = (np.arange(left, right) / scale).astype(np.int64)
+    mask = rows[None, :] & (columns[:, None] >= first[index][None, :]) & (columns[:, None] <= last[index][None, :])
+    
+    pixels = pygame.surfarray.pixels3d(surface)
+    region = pixels[left:right, top:bottom]
+    region[mask] = np.broadcast_to(colors[index][None, :, :], mask.shape + (3,))[mask]
+    del region, pixels
+
+class RotationCache:
+    def __init__(self, image, min_angle, max_angle, step=1):
+        self.min_angle = min_angle
+        self.step = step
+        self.frames = []
         
-        if self.y + self.size > SCREEN_HEIGHT - FLOOR_HEIGHT:
-            self.y = SCREEN_HEIGHT - FLOOR_HEIGHT - self.size
-            self.velocity = 0
-            
-        self.rotation = max(-30, min(self.velocity * 3, 70))
+        for i in range(int((max_angle - min_angle) / step) + 1):
+            self.frames.append(pygame.transform.rotate(image, min_angle + i * step))
+    
+    def index(self, angle):
+        index = int(round((angle - self.min_angle) / self.step))
+        return max(0, min(index, len(self.frames) - 1))
+
+class SpriteAtlas:
+    def __init__(self, width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+        self.width = width
+        self.padding = padding
+        self.pending = []
+        self.areas = {}
+        self.surface = None
+        self.shadow_surface = None
+    
+    def add(self, key, image):
+        self.pending.append((key, image))
     
-    def jump(self):
-        self.velocity = BIRD_JUMP
+    def cell(self, length):
+        return -(-(length + self.padding) // self.padding) * self.padding
     
-    def get_mask(self):
-        return pygame.Rect(self.x - self.size//2, self.y - self.size//2, 
-                          self.size, self.size)
+    def build(self):
+        x = y = row_height = 0
+        placed = []
+        for key, image in sorted(self.pending, key=lambda item: -item[1].get_height()):
+            width, height = image.get_size()
+            if x + width > self.width:
+                x = 0
+                y += row_height
+                row_height = 0
+            placed.append((key, image, pygame.Rect(x, y, width, height)))
+            x += self.cell(width)
+            row_height = max(row_height, self.cell(height))
+        
+        self.surface = pygame.Surface((self.width, y + row_height), pygame.SRCALPHA).convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        for key, image, area in placed:
+            self.surface.blit(image, area)
+            self.areas[key] = area
+        self.shadow_surface = self.surface.copy()
+        self.shadow_surface.fill((255, 255, 255, SHADOW_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+        self.pending = []
 
-class Obstacle:
-    def __init__(self, x):
-        self.x = x
-        self.height = random.randint(100, SCREEN_HEIGHT - FLOOR_HEIGHT - OBSTACLE_GAP - 100)
-        self.passed = False
-        self.width = 60
+class AssetRegistry:
+    def __init__(self, directory='assets'):
+        self.directory = directory
+        self.cache = {}
+    
+    def load_image(self, filename):
+        return pygame.image.load(os.path.join(self.directory, filename)).convert_alpha()
+    
+    def load(self):
+        bird = self.load_image('bird.png')
+        bird = pygame.transform.scale(bird, (BIRD_SIZE * 2, BIRD_SIZE * 2)).convert_alpha()
+        self.cache['bird'] = bird
+        rotations = RotationCache(bird, BIRD_MIN_ROTATION, BIRD_MAX_ROTATION, BIRD_ROTATION_STEP)
+        self.cache['bird_rotations'] = rotations
         
-        self.sprite_sheet = pygame.image.load(os.path.join('assets', 'dinosaur.png'))
+        sprite_sheet = self.load_image('dinosaur.png')
         
-        self.dino_image = pygame.Surface((44, 47), pygame.SRCALPHA)
-        self.dino_image.blit(self.sprite_sheet, (0, 0), (848, 2, 44, 47))
+        dino = pygame.Surface((44, 47), pygame.SRCALPHA)
+        dino.blit(sprite_sheet, (0, 0), (848, 2, 44, 47))
         
-        black_filter = pygame.Surface(self.dino_image.get_size(), pygame.SRCALPHA)
+        black_filter = pygame.Surface(dino.get_size(), pygame.SRCALPHA)
         black_filter.fill((0, 0, 0, 255))
         
-        original_alpha = pygame.surfarray.pixels_alpha(self.dino_image).copy()
-        self.dino_image.blit(black_filter, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        pygame.surfarray.pixels_alpha(self.dino_image)[:] = original_alpha
+        original_alpha = pygame.surfarray.pixels_alpha(dino).copy()
+        dino.blit(black_filter, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        pygame.surfarray.pixels_alpha(dino)[:] = original_alpha
         
-        self.dino_size = (50, 50)
-        self.dino_image = pygame.transform.scale(self.dino_image, self.dino_size)
+        dino = pygame.transform.scale(dino, DINO_SIZE).convert_alpha()
+        self.cache['dino'] = dino
         
-        self.top_dinos = []
-        self.bottom_dinos = []
+        atlas = SpriteAtlas()
+        atlas.add('dino', dino)
+        for index, frame in enumerate(rotations.frames):
+            atlas.add(('bird', index), frame)
+        atlas.build()
+        self.cache['atlas'] = atlas
+    
+    def get(self, name):
+        if not self.cache:
+            self.load()
+        return self.cache[name]
+
+assets = AssetRegistry()
+mask_collider = None
+
+def pixel_collider():
+    global mask_collider
+    if mask_collider is None:
+        mask_collider = MaskCollider(assets.get('bird'), assets.get('dino'), BIRD_ROTATION_STEP)
+    return mask_collider
+
+def interpolate(previous, current, alpha):
+    return previous + (current - previous) * alpha
+
+class RenderQueue:
+    def __init__(self, layers=LAYER_OVERLAY + 1):
+        self.layers = [[] for _ in range(layers)]
+    
+    def submit(self, layer, surface, dest, area=None):
+        self.layers[layer].append((surface, dest, area))
+    
+    def extend(self, layer, commands):
+        self.layers[layer].extend(commands)
+    
+    def flush(self, target, layers):
+        rects = []
+        for layer in layers:
+            commands = self.layers[layer]
+            if commands:
+                rects.extend(target.blits(commands))
+                commands.clear()
+        return rects
+
+render_queue = RenderQueue()
+
+def draw_bird(bird, alpha=1.0):
+    atlas = assets.get('atlas')
+    index = assets.get('bird_rotations').index(interpolate(bird.prev_rotation, bird.rotation, alpha))
+    area = atlas.areas[('bird', index)]
+    rect = pygame.Rect((0, 0), area.size)
+    rect.center = (bird.x, interpolate(bird.prev_y, bird.y, alpha))
+    
+    if quality['shadows']:
+        render_queue.submit(LAYER_BIRD_SHADOW, atlas.shadow_surface,
+                            rect.move(bird.shadow_offset, bird.shadow_offset), area)
+    render_queue.submit(LAYER_BIRD, atlas.surface, rect, area)
+
+def draw_obstacle(obstacle, alpha=1.0):
+    shadow_offset = 8
+    atlas = assets.get('atlas')
+    area = atlas.areas['dino']
+    x = interpolate(obstacle.prev_x, obstacle.x, alpha)
+    bottom_y_start = obstacle.height + OBSTACLE_GAP
+    positions = list(obstacle.top_dinos)
+    positions.extend(bottom_y_start + y_offset for y_offset in obstacle.bottom_dinos)
+    
+    if quality['shadows']:
+        shadow_surface = atlas.shadow_surface
+        render_queue.extend(LAYER_OBSTACLE_SHADOWS, [(shadow_surface, (x + shadow_offset, y_pos + shadow_offset), area)
+                                                     for y_pos in positions])
+    dino_surface = atlas.surface
+    render_queue.extend(LAYER_OBSTACLES, [(dino_surface, (x, y_pos), area) for y_pos in positions])
+
+def merge_rects(rects, waste=DIRTY_MERGE_WASTE):
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        if not rect.width or not rect.height:
+            continue
+        candidates = rect.collidelistall(merged)
+        while candidates:
+            for index in candidates:
+                other = merged[index]
+                union = rect.union(other)
+                overlap = rect.clip(other)
+                area = rect.width * rect.height
+                other_area = other.width * other.height
+                extra = union.width * union.height - area - other_area + overlap.width * overlap.height
+                if extra <= waste * min(area, other_area):
+                    del merged[index]
+                    rect = union
+                    break
+            else:
+                break
+            candidates = rect.collidelistall(merged)
+        merged.append(rect)
+    return merged
+
+class ScaledView:
+    def __init__(self, scale, surface=None):
+        self.scale = scale
+        if surface is None:
+            surface = pygame.Surface((int(SCREEN_WIDTH * scale), int(SCREEN_HEIGHT * scale))).convert()
+        self.surface = surface
+        self.sprites = weakref.WeakKeyDictionary()
+    
+    def sprite(self, source):
+        if native_scale.get(source) == self.scale:
+            return source
+        scaled = self.sprites.get(source)
+        if scaled is None:
+            width, height = source.get_size()
+            size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+            colorkey = source.get_colorkey()
+            if colorkey is None:
+                scaled = pygame.transform.smoothscale(source, size)
+            else:
+                scaled = pygame.transform.scale(source, size)
+                scaled.set_colorkey(colorkey, pygame.RLEACCEL)
+            self.sprites[source] = scaled
+        scaled.set_alpha(source.get_alpha())
+        return scaled
+    
+    def logical(self, rect):
+        return pygame.Rect(rect.x / self.scale, rect.y / self.scale,
+                           math.ceil(rect.width / self.scale), math.ceil(rect.height / self.scale))
+    
+    def scaled_area(self, area):
+        if area is None:
+            return None
+        x, y, width, height = area
+        return (x * self.scale, y * self.scale, max(1, width * self.scale), max(1, height * self.scale))
+    
+    def blit(self, source, dest, area=None):
+        rect = self.surface.blit(self.sprite(source), (dest[0] * self.scale, dest[1] * self.scale),
+                                 self.scaled_area(area))
+        return self.logical(rect)
+    
+    def blits(self, commands):
+        scale = self.scale
+        rects = self.surface.blits([(self.sprite(source), (dest[0] * scale, dest[1] * scale), self.scaled_area(area))
+                                    for source, dest, area in commands])
+        return [self.logical(rect) for rect in rects]
+    
+    def fill(self, color, rect):
+        x, y, width, height = rect
+        rect = self.surface.fill(color, (x * self.scale, y * self.scale,
+                                         max(1, width * self.scale), max(1, height * self.scale)))
+        return self.logical(rect)
+    
+    def present(self, surface):
+        if self.surface.get_size() == surface.get_size():
+            surface.blit(self.surface, (0, 0))
+        else:
+            pygame.transform.scale(self.surface, surface.get_size(), surface)
+
+class QualityController:
+    def __init__(self, budget_ms, tiers=QUALITY_TIERS, window=QUALITY_WINDOW, cooldown=QUALITY_COOLDOWN,
+                 down_threshold=QUALITY_DOWN_THRESHOLD, up_threshold=QUALITY_UP_THRESHOLD, stable=QUALITY_STABLE_FRAMES):
+        self.budget_ms = budget_ms
+        self.tiers = tiers
+        self.window = deque(maxlen=window)
+        self.cooldown = cooldown
+        self.stable = stable
+        self.down_threshold = down_threshold
+        self.up_threshold = up_threshold
+        self.tier = 0
+        self.frames_since_change = 0
+        self.up_delay = cooldown
+        self.changes = []
+    
+    def observe(self, frame_ms):
+        self.window.append(frame_ms)
+        self.frames_since_change += 1
+        if self.frames_since_change >= self.stable:
+            self.up_delay = self.cooldown
+        if self.frames_since_change < self.cooldown or len(self.window) < self.window.maxlen:
+            return None
         
-        for i in range(0, self.height, self.dino_size[1]):
-            if random.random() > 0.5:
-                self.top_dinos.append(i)
+        p90 = sorted(self.window)[int(0.9 * (len(self.window) - 1))]
+        if p90 > self.budget_ms * self.down_threshold and self.tier < len(self.tiers) - 1:
+            if self.changes and self.changes[-1][1] < self.changes[-1][0]:
+                self.up_delay *= 2
+            return self.change(self.tier + 1, p90)
+        if (p90 < self.budget_ms * self.up_threshold and self.tier > 0
+                and self.frames_since_change >= self.up_delay):
+            return self.change(self.tier - 1, p90)
+        return None
+    
+    def change(self, tier, p90):
+        self.changes.append((self.tier, tier, p90))
+        self.tier = tier
+        self.frames_since_change = 0
+        self.window.clear()
+        return tier
+
+class DirtyRects:
+    def __init__(self, band, threshold=DIRTY_AREA_THRESHOLD):
+        self.band = band
+        self.sky = pygame.Rect(0, 0, band.width, band.top)
+        self.threshold = threshold
+        self.drawn = None
+        self.previous = []
+        self.current = []
+        self.full = True
+    
+    def add(self, rects):
+        if isinstance(rects, pygame.Rect):
+            self.current.append(rects)
+        else:
+            self.current.extend(rects)
+    
+    def invalidate(self):
+        self.full = True
+    
+    def update(self):
+        sky = self.sky
+        rects = merge_rects([rect.clip(sky) for rect in self.previous + self.current])
+        area = sum(rect.width * rect.height for rect in rects)
+        
+        if self.full or area > self.threshold * sky.width * sky.height:
+            pygame.display.update()
+        else:
+            pygame.display.update([self.band] + rects)
         
-        bottom_space = SCREEN_HEIGHT - FLOOR_HEIGHT - self.height - OBSTACLE_GAP
-        for i in range(0, bottom_space, self.dino_size[1]):
-            if random.random() > 0.5:
-                self.bottom_dinos.append(i)
+        self.previous = self.current
+        self.current = []
+        self.full = False
+
+class BakedSurfaces:
+    def __init__(self):
+        self.scale = None
+        self.generation = 0
+        self.baked = None
+        self.requested = None
+        self.ready = None
+        self.lock = threading.Lock()
     
-    def draw(self):
-        shadow_offset = 8
-        shadow_img = self.dino_image.copy()
-        shadow_img.set_alpha(100)
+    def invalidate(self):
+        self.generation += 1
+    
+    def warm(self):
+        self.baked = (self.generation, render_scale)
+        self.install(self.bake(render_scale), render_scale)
+    
+    def finish(self, generation, scale, surfaces):
+        with self.lock:
+            self.ready = (generation, scale, surfaces)
+    
+    def fail(self, generation, scale):
+        pass
+    
+    def refresh(self):
+        with self.lock:
+            ready, self.ready = self.ready, None
+        if ready is not None and ready[0] == self.generation:
+            self.baked = ready[:2]
+            self.install(ready[2], ready[1])
+        
+        if self.scale is None:
+            self.warm()
+        elif self.baked != (self.generation, render_scale) and self.requested != (self.generation, render_scale):
+            self.requested = (self.generation, render_scale)
+            chunk_worker.submit(self, self.generation, render_scale)
+
+class Backdrop(BakedSurfaces):
+    def __init__(self, render, size, overlay=None):
+        super().__init__()
+        self.render = render
+        self.overlay = overlay
+        self.size = size
+        self.day_surface = None
+        self.night_surface = None
+        self.plain_day_surface = None
+        self.plain_night_surface = None
+    
+    def bake_layer(self, mode_transition, scale):
+        plain_surface = pygame.Surface(scaled_size(self.size, scale)).convert()
+        self.render(plain_surface, mode_transition, scale)
+        surface = plain_surface.copy()
+        if self.overlay is not None:
+            self.overlay(surface if scale == 1 else ScaledView(scale, surface), mode_transition)
+        native_scale[plain_surface] = native_scale[surface] = scale
+        return plain_surface, surface
+    
+    def bake(self, scale):
+        return self.bake_layer(0.0, scale) + self.bake_layer(1.0, scale)
+    
+    def install(self, surfaces, scale):
+        self.plain_day_surface, self.day_surface, self.plain_night_surface, self.night_surface = surfaces
+        self.scale = scale
+    
+    def draw(self, surface, mode_transition=0.0):
+        self.refresh()
         
-        for y_pos in self.top_dinos:
-            screen.blit(shadow_img, (self.x + shadow_offset, y_pos + shadow_offset))
-            screen.blit(self.dino_image, (self.x, y_pos))
+        if mode_transition <= 0:
+            surface.blit(at_render_scale(self.day_surface), (0, 0))
+        elif mode_transition >= 1:
+            surface.blit(at_render_scale(self.night_surface), (0, 0))
+        else:
+            surface.blit(at_render_scale(self.plain_day_surface), (0, 0))
+            self.plain_night_surface.set_alpha(int(255 * mode_transition))
+            surface.blit(at_render_scale(self.plain_night_surface), (0, 0))
+            self.plain_night_surface.set_alpha(None)
+            if self.overlay is not None:
+                self.overlay(surface, mode_transition)
+    
+    def restore(self, surface, mode_transition, rects):
+        self.refresh()
         
-        bottom_y_start = self.height + OBSTACLE_GAP
-        for y_offset in self.bottom_dinos:
-            y_pos = bottom_y_start + y_offset
-            screen.blit(shadow_img, (self.x + shadow_offset, y_pos + shadow_offset))
-            screen.blit(self.dino_image, (self.x, y_pos))
+        source = at_render_scale(self.day_surface if mode_transition <= 0 else self.night_surface)
+        for rect in rects:
+            surface.blit(source, rect, rect)
+
+class CelestialSprites:
+    def __init__(self, alpha_step=CELESTIAL_ALPHA_STEP):
+        self.alpha_step = alpha_step
+        self.sprites = {}
     
-    def update(self):
-        self.x -= 3
+    def render_sun(self, sun_alpha, glows=True):
+        sprite = pygame.Surface((120, 120), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (255, 255, 200), (60, 60), 40)
+        
+        for i in range(5 if glows else 0):
+            glow_alpha = max(0, min(255, sun_alpha - i*50))
+            if glow_alpha > 10:
+                glow_surface = pygame.Surface((80 + i*10, 80 + i*10), pygame.SRCALPHA)
+                pygame.draw.circle(glow_surface, (255, 255, 150, glow_alpha), 
+                                 (40 + i*5, 40 + i*5), 40 + i*5)
+                sprite.blit(glow_surface, (20 - i*5, 20 - i*5))
+        
+        return sprite, (-60, -60)
     
-    def collide(self, bird):
-        bird_rect = bird.get_mask()
+    def render_moon(self, moon_alpha, glows=True):
+        sprite = pygame.Surface((80, 80), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (220, 220, 230), (40, 40), 30)
         
-        for y_pos in self.top_dinos:
-            dino_rect = pygame.Rect(self.x, y_pos, self.dino_size[0], self.dino_size[1])
-            if bird_rect.colliderect(dino_rect):
-                return True
+        if moon_alpha > 100:
+            crater_color = (200, 200, 210)
+            pygame.draw.circle(sprite, crater_color, (40 - 10, 40 - 15), 8)
+            pygame.draw.circle(sprite, crater_color, (40 + 10, 40 - 5), 6)
+            pygame.draw.circle(sprite, crater_color, (40 - 15, 40 + 5), 7)
+            pygame.draw.circle(sprite, crater_color, (40 + 5, 40 + 10), 9)
         
-        bottom_y_start = self.height + OBSTACLE_GAP
-        for y_offset in self.bottom_dinos:
-            y_pos = bottom_y_start + y_offset
-            dino_rect = pygame.Rect(self.x, y_pos, self.dino_size[0], self.dino_size[1])
-            if bird_rect.colliderect(dino_rect):
-                return True
+        for i in range(3 if glows else 0):
+            glow_alpha = max(0, min(255, moon_alpha - i*70))
+            if glow_alpha > 10:
+                glow_surface = pygame.Surface((60 + i*10, 60 + i*10), pygame.SRCALPHA)
+                pygame.draw.circle(glow_surface, (220, 220, 240, glow_alpha), 
+                                (30 + i*5, 30 + i*5), 30 + i*5)
+                sprite.blit(glow_surface, (10 - i*5, 10 - i*5))
         
-        return False
+        return sprite, (-40, -40)
+    
+    def get(self, body, alpha):
+        if 0 < alpha < 255:
+            alpha = max(1, min(254, int(round(alpha / self.alpha_step)) * self.alpha_step))
+        key = (body, alpha, quality['glows'])
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            render = self.render_sun if body == 'sun' else self.render_moon
+            sprite = render(alpha, quality['glows'])
+            self.sprites[key] = sprite
+        return sprite
 
-class Background:
+celestial_sprites = CelestialSprites()
+
+class CloudSprites:
+    def __init__(self, size_step=CLOUD_SIZE_STEP, alpha_step=CLOUD_ALPHA_STEP):
+        self.size_step = size_step
+        self.alpha_step = alpha_step
+        self.sprites = {}
+    
+    def render(self, size, alpha, detail=True):
+        cloud_color = (255, 255, 255, alpha)
+        shadow_color = (200, 200, 200, alpha)
+        shadow_offset = 5
+        
+        origin_x = 20 * size
+        origin_y = 10 * size
+        sprite = pygame.Surface((85 * size + shadow_offset + 1, 45 * size + shadow_offset + 1), pygame.SRCALPHA)
+        
+        layers = [
+            ((60 * size, 30 * size), shadow_color, (origin_x + shadow_offset, origin_y + shadow_offset)),
+            ((60 * size, 30 * size), cloud_color, (origin_x, origin_y)),
+            ((40 * size, 25 * size), cloud_color, (origin_x + 20 * size, origin_y - 10 * size)),
+            ((50 * size, 25 * size), cloud_color, (origin_x - 20 * size, origin_y - 5 * size)),
+        ]
+        if not detail:
+            layers = layers[1:2]
+        for (width, height), color, position in layers:
+            layer = pygame.Surface((width, height), pygame.SRCALPHA)
+            pygame.draw.ellipse(layer, color, (0, 0, width, height))
+            sprite.blit(layer, position)
+        
+        return sprite, (-origin_x, -origin_y)
+    
+    def get(self, size, alpha):
+        key = (int(round(size / self.size_step)), int(round(alpha / self.alpha_step)), quality['cloud_detail'])
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.render(key[0] * self.size_step, min(255, key[1] * self.alpha_step), key[2])
+            self.sprites[key] = sprite
+        return sprite
+
+cloud_sprites = CloudSprites()
+
+class StarField:
+    def __init__(self, seed=None, count=STAR_COUNT, twinkle_chance=TWINKLE_CHANCE):
+        self.rng = np.random.default_rng(seed)
+        self.x = self.rng.integers(0, SCREEN_WIDTH, count, endpoint=True)
+        self.y = self.rng.integers(10, SCREEN_HEIGHT - FLOOR_HEIGHT - 50, count, endpoint=True)
+        self.brightness = self.rng.random(count) * 0.8 + 0.2
+        self.twinkle_chance = twinkle_chance
+        self.visible = None
+        self.source = None
+    
+    def write(self, surface, stars, values, scale=1.0):
+        width, height = surface.get_size()
+        radius = max(1, round(scale))
+        pixels = pygame.surfarray.pixels3d(surface)
+        for dx in range(-radius, radius):
+            for dy in range(-radius, radius):
+                x = (self.x[stars] * scale).astype(np.int64) + dx
+                y = (self.y[stars] * scale).astype(np.int64) + dy
+                inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+                pixels[x[inside], y[inside]] = values[inside, None]
+        del pixels
+    
+    def render(self, surface, mode_transition=0.0, scale=1.0):
+        values = (255 * mode_transition * self.brightness).astype(np.int64)
+        stars = np.flatnonzero(values > 0)
+        if stars.size:
+            self.write(surface, stars, np.minimum(values[stars], 255), scale)
+    
+    def find_visible(self, night_surface, scale=1.0):
+        width, height = night_surface.get_size()
+        x = (self.x * scale).astype(np.int64)
+        y = (self.y * scale).astype(np.int64)
+        inside = np.flatnonzero((x < width) & (y < height))
+        values = np.minimum(255, (255 * self.brightness[inside]).astype(np.int64))
+        pixels = pygame.surfarray.pixels3d(night_surface)
+        colors = pixels[x[inside], y[inside]]
+        del pixels
+        self.visible = inside[(colors == values[:, None]).all(axis=1)]
+        self.source = night_surface
+    
+    def twinkle(self, surface, mode_transition=0.0):
+        count = self.rng.binomial(self.visible.size, self.twinkle_chance)
+        if not count:
+            return []
+        
+        stars = self.visible[self.rng.choice(self.visible.size, count, replace=False)]
+        values = np.minimum(255, (255 * mode_transition * self.brightness[stars]).astype(np.int64) + 50)
+        rects = []
+        for x, y, value in zip(self.x[stars].tolist(), self.y[stars].tolist(), values.tolist()):
+            rects.append(surface.fill((value, value, value), (x - 1, y - 1, 2, 2)))
+        return rects
+
+class ChunkWorker:
     def __init__(self):
+        self.requests = queue.SimpleQueue()
+        self.thread = None
+    
+    def submit(self, owner, generation, key):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.requests.put((owner, generation, key))
+    
+    def run(self):
+        while True:
+            owner, generation, key = self.requests.get()
+            try:
+                result = owner.bake(key)
+            except Exception:
+                traceback.print_exc()
+                owner.fail(generation, key)
+                continue
+            owner.finish(generation, key, result)
+
+chunk_worker = ChunkWorker()
+
+class ChunkStreamer:
+    def __init__(self, generate, render, height, parallax, capacity=CHUNK_CACHE_SIZE, prefetch=CHUNK_PREFETCH):
+        self.generate = generate
+        self.render = render
+        self.size = (CHUNK_WIDTH, height)
+        self.top = SCREEN_HEIGHT - FLOOR_HEIGHT - height
+        self.parallax = parallax
+        self.capacity = capacity
+        self.prefetch = prefetch
+        self.chunks = OrderedDict()
+        self.pending = set()
+        self.failed = set()
+        self.generation = 0
+        self.scale = render_scale
+        self.lock = threading.Lock()
+    
+    def bake_layer(self, index, features, mode_transition, scale):
+        surface = pygame.Surface(scaled_size(self.size, scale)).convert()
+        surface.fill(CHUNK_COLORKEY)
+        self.render(surface, features, mode_transition, -index * CHUNK_WIDTH, -self.top, scale)
+        surface.set_colorkey(CHUNK_COLORKEY, pygame.RLEACCEL)
+        native_scale[surface] = scale
+        return surface
+    
+    def bake(self, index):
+        scale = self.scale
+        features = []
+        for neighbour in (index - 1, index, index + 1):
+            features.extend(self.generate(neighbour))
+        return self.bake_layer(index, features, 0.0, scale), self.bake_layer(index, features, 1.0, scale)
+    
+    def store(self, index, chunk):
+        self.chunks[index] = chunk
+        self.chunks.move_to_end(index)
+        while len(self.chunks) > self.capacity:
+            self.chunks.popitem(last=False)
+    
+    def finish(self, generation, index, chunk):
+        with self.lock:
+            if generation == self.generation:
+                self.pending.discard(index)
+                self.store(index, (generation, chunk))
+    
+    def fail(self, generation, index):
+        with self.lock:
+            if generation == self.generation:
+                self.pending.discard(index)
+                self.failed.add(index)
+    
+    def get(self, index):
+        with self.lock:
+            entry = self.chunks.get(index)
+            if entry is not None:
+                self.chunks.move_to_end(index)
+            if (entry is None or entry[0] != self.generation) and index not in self.pending and index not in self.failed:
+                self.pending.add(index)
+                chunk_worker.submit(self, self.generation, index)
+        return None if entry is None else entry[1]
+    
+    def visible(self, scroll):
+        offset = scroll * self.parallax
+        first = int(offset // CHUNK_WIDTH)
+        last = int((offset + SCREEN_WIDTH - 1) // CHUNK_WIDTH)
+        return offset, range(first, last + 1)
+    
+    def warm(self, scroll=0.0):
+        offset, indexes = self.visible(scroll)
+        for index in indexes:
+            chunk = self.bake(index)
+            with self.lock:
+                self.store(index, (self.generation, chunk))
+    
+    def invalidate(self, scale=None):
+        with self.lock:
+            self.generation += 1
+            self.pending.clear()
+            self.failed.clear()
+            if scale is not None:
+                self.scale = scale
+    
+    def draw(self, layer, scroll, mode_transition=0.0):
+        offset, indexes = self.visible(scroll)
+        commands = []
+        for index in indexes:
+            chunk = self.get(index)
+            if chunk is None:
+                continue
+            
+            day_surface, night_surface = chunk
+            dest = (index * CHUNK_WIDTH - offset, self.top)
+            if mode_transition <= 0:
+                commands.append((at_render_scale(day_surface), dest, None))
+            elif mode_transition >= 1:
+                night_surface.set_alpha(None)
+                commands.append((at_render_scale(night_surface), dest, None))
+            else:
+                night_surface.set_alpha(int(255 * mode_transition))
+                commands.append((at_render_scale(day_surface), dest, None))
+                commands.append((at_render_scale(night_surface), dest, None))
+        
+        for index in range(indexes.stop, indexes.stop + self.prefetch):
+            self.get(index)
+        render_queue.extend(layer, commands)
+
+class Background:
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.scroll = 0.0
         self.cloud_positions = []
         self.cloud_speeds = []
         self.cloud_sizes = []
         self.sun_pos = (SCREEN_WIDTH - 80, 80)
         self.moon_pos = (80, 80)
-        self.mountains = []
-        self.mountain_details = []
-        self.trees = []
-        
-        for i in range(8):
-            mountain_x = random.randint(-100, SCREEN_WIDTH + 100)
-            mountain_h = random.randint(100, 250)
-            mountain_w = random.randint(200, 350)
+        
+        self.star_field = StarField(random.Random(f'{self.seed}:stars').randrange(2 ** 32))
+        
+        self.cloud_random = random.Random(f'{self.seed}:clouds')
+        for _ in range(CLOUD_COUNT):
+            self.cloud_positions.append([self.cloud_random.randint(0, SCREEN_WIDTH), 
+                                        self.cloud_random.randint(20, SCREEN_HEIGHT//3)])
+            self.cloud_speeds.append(self.cloud_random.uniform(12, 48))
+            self.cloud_sizes.append(self.cloud_random.uniform(0.7, 1.3))
+        
+        self.backdrop = Backdrop(self.draw_sky, (SCREEN_WIDTH, SCREEN_HEIGHT - FLOOR_HEIGHT),
+                                 self.draw_celestial)
+        self.mountain_layer = ChunkStreamer(self.generate_mountains, self.render_mountains,
+                                            MOUNTAIN_LAYER_HEIGHT, MOUNTAIN_PARALLAX)
+        self.tree_layer = ChunkStreamer(self.generate_trees, self.render_trees, TREE_LAYER_HEIGHT, TREE_PARALLAX)
+        self.floor = FloorTexture(random.Random(f'{self.seed}:floor'))
+    
+    def chunk_random(self, layer, index):
+        return random.Random(f'{self.seed}:{layer}:{index}')
+    
+    def generate_mountains(self, index):
+        rng = self.chunk_random('mountains', index)
+        mountains = []
+        
+        for i in range(MOUNTAINS_PER_CHUNK):
+            mountain_x = index * CHUNK_WIDTH + rng.randint(0, CHUNK_WIDTH - 1)
+            mountain_h = rng.randint(100, 250)
+            mountain_w = rng.randint(200, 350)
             
             detail_points = [(mountain_x - mountain_w//2, SCREEN_HEIGHT - FLOOR_HEIGHT)]
             
@@ -173,14 +970,14 @@ class Background:
                 x = mountain_x - mountain_w//2 + (mountain_w * j // steps)
                 progress = j / steps
                 height_factor = 1.0 - 4 * (progress - 0.5) * (progress - 0.5)
-                height_variation = math.sin(j * 0.5) * 15 + random.randint(-8, 8)
+                height_variation = math.sin(j * 0.5) * 15 + rng.randint(-8, 8)
                 
                 height_variation = (height_variation + last_height) / 2
                 last_height = height_variation
                 
                 y = SCREEN_HEIGHT - FLOOR_HEIGHT - mountain_h * height_factor + height_variation
                 detail_points.append((x, y))
-                
+            
             detail_points.append((mountain_x + mountain_w//2, SCREEN_HEIGHT - FLOOR_HEIGHT))
             
             has_snow = mountain_h > 180
@@ -193,20 +990,20 @@ class Background:
                         snow_points.append((x, y))
             
             texture_points = []
-            for k in range(random.randint(3, 8)):
-                tx = random.randint(mountain_x - mountain_w//3, mountain_x + mountain_w//3)
-                ty = random.randint(SCREEN_HEIGHT - FLOOR_HEIGHT - mountain_h//2, 
-                                  SCREEN_HEIGHT - FLOOR_HEIGHT - mountain_h//5)
-                size = random.randint(10, 30)
+            for k in range(rng.randint(3, 8)):
+                tx = rng.randint(mountain_x - mountain_w//3, mountain_x + mountain_w//3)
+                ty = rng.randint(SCREEN_HEIGHT - FLOOR_HEIGHT - mountain_h//2, 
+                                 SCREEN_HEIGHT - FLOOR_HEIGHT - mountain_h//5)
+                size = rng.randint(10, 30)
                 texture_points.append((tx, ty, size))
             
-            trees_count = random.randint(2, 6)
+            trees_count = rng.randint(2, 6)
             mountain_trees = []
             for _ in range(trees_count):
-                tree_x = random.randint(mountain_x - mountain_w//3, mountain_x + mountain_w//3)
-                tree_y = SCREEN_HEIGHT - FLOOR_HEIGHT - random.randint(20, mountain_h//3)
-                tree_height = random.randint(15, 30)
-                tree_width = random.randint(8, 15)
+                tree_x = rng.randint(mountain_x - mountain_w//3, mountain_x + mountain_w//3)
+                tree_y = SCREEN_HEIGHT - FLOOR_HEIGHT - rng.randint(20, mountain_h//3)
+                tree_height = rng.randint(15, 30)
+                tree_width = rng.randint(8, 15)
                 mountain_trees.append((tree_x, tree_y, tree_height, tree_width))
             
             mountain_data = {
@@ -217,140 +1014,104 @@ class Background:
                 'texture': texture_points,
                 'trees': mountain_trees
             }
-            self.mountains.append(mountain_data)
+            mountains.append(mountain_data)
         
-        self.mountains.sort(key=lambda m: m['base'][1])
+        return mountains
+    
+    def generate_trees(self, index):
+        rng = self.chunk_random('trees', index)
+        trees = []
         
-        for _ in range(10):
-            tree_x = random.randint(0, SCREEN_WIDTH)
+        for _ in range(TREES_PER_CHUNK):
+            tree_x = index * CHUNK_WIDTH + rng.randint(0, CHUNK_WIDTH - 1)
             tree_y = SCREEN_HEIGHT - FLOOR_HEIGHT
-            tree_height = random.randint(30, 70)
-            tree_width = random.randint(15, 30)
-            self.trees.append((tree_x, tree_y, tree_height, tree_width))
-        
-        self.stars = [(random.randint(0, SCREEN_WIDTH), 
-                      random.randint(10, SCREEN_HEIGHT - FLOOR_HEIGHT - 50), 
-                      random.random() * 0.8 + 0.2)
-                     for _ in range(100)]
-        
-        for _ in range(10):
-            self.cloud_positions.append([random.randint(0, SCREEN_WIDTH), 
-                                        random.randint(20, SCREEN_HEIGHT//3)])
-            self.cloud_speeds.append(random.uniform(0.2, 0.8))
-            self.cloud_sizes.append(random.uniform(0.7, 1.3))
-    
-    def draw(self, mode_transition=0.0):
-        for i in range(SCREEN_HEIGHT - FLOOR_HEIGHT):
-            day_color_value = 235 - int(i * 0.2)
-            day_color = (135, 206, day_color_value)
-            
-            night_color_value = max(0, 50 - int(i * 0.15))
-            night_color = (25, 25, night_color_value)
-            
-            r = int(day_color[0] * (1 - mode_transition) + night_color[0] * mode_transition)
-            g = int(day_color[1] * (1 - mode_transition) + night_color[1] * mode_transition)
-            b = int(day_color[2] * (1 - mode_transition) + night_color[2] * mode_transition)
-            
-            pygame.draw.line(screen, (r, g, b), (0, i), (SCREEN_WIDTH, i))
+            tree_height = rng.randint(30, 70)
+            tree_width = rng.randint(15, 30)
+            trees.append((tree_x, tree_y, tree_height, tree_width))
+        
+        return trees
+    
+    def invalidate(self):
+        self.backdrop.invalidate()
+        self.mountain_layer.invalidate()
+        self.tree_layer.invalidate()
+    
+    def bake(self):
+        self.backdrop.warm()
+        self.floor.warm()
+        self.mountain_layer.warm(self.scroll)
+        self.tree_layer.warm(self.scroll)
+    
+    def rescale(self, scale):
+        self.mountain_layer.invalidate(scale)
+        self.tree_layer.invalidate(scale)
+    
+    def draw(self, mode_transition=0.0, restore=None):
+        if self.mountain_layer.scale != render_scale:
+            self.rescale(render_scale)
+        
+        if restore is None:
+            self.backdrop.draw(view, mode_transition)
+        else:
+            self.backdrop.restore(view, mode_transition, restore)
+        
+        self.mountain_layer.draw(LAYER_MOUNTAINS, self.scroll, mode_transition)
+        self.tree_layer.draw(LAYER_TREES, self.scroll, mode_transition)
+        self.draw_clouds(mode_transition)
+        return self.draw_twinkle(view, mode_transition)
+    
+    def draw_floor(self, mode_transition=0.0, scroll=0.0):
+        self.floor.draw(mode_transition, scroll)
+    
+    def draw_twinkle(self, surface, mode_transition=0.0):
+        if mode_transition <= 0 or not quality['twinkle']:
+            return []
         
-        for x, y, brightness in self.stars:
-            star_alpha = int(255 * mode_transition * brightness)
-            if star_alpha > 0:
-                star_brightness = min(255, star_alpha)
-                if random.random() > 0.99:
-                    star_brightness = min(255, star_brightness + 50)
-                pygame.draw.circle(screen, (star_brightness, star_brightness, star_brightness), (int(x), int(y)), 1)
+        if self.star_field.source is not self.backdrop.night_surface:
+            self.star_field.find_visible(self.backdrop.night_surface, self.backdrop.scale)
         
+        return self.star_field.twinkle(surface, mode_transition)
+    
+    def draw_celestial(self, surface, mode_transition=0.0):
         sun_alpha = int(255 * (1 - mode_transition))
         moon_alpha = int(255 * mode_transition)
         
-        if sun_alpha > 0:
-            sun_alpha_safe = min(255, sun_alpha) 
-            pygame.draw.circle(screen, (255, 255, 200), (self.sun_pos[0], self.sun_pos[1]), 40)
-            
-            for i in range(5):
-                glow_alpha = max(0, min(255, sun_alpha - i*50))
-                if glow_alpha > 10:
-                    glow_surface = pygame.Surface((80 + i*10, 80 + i*10), pygame.SRCALPHA)
-                    pygame.draw.circle(glow_surface, (255, 255, 150, glow_alpha), 
-                                     (40 + i*5, 40 + i*5), 40 + i*5)
-                    screen.blit(glow_surface, (self.sun_pos[0] - 40 - i*5, self.sun_pos[1] - 40 - i*5))
-        
-        if moon_alpha > 0:
-            moon_alpha_safe = min(255, moon_alpha)
-            pygame.draw.circle(screen, (220, 220, 230), (self.moon_pos[0], self.moon_pos[1]), 30)
-            
-            if moon_alpha > 100:
-                crater_color = (200, 200, 210)
-                pygame.draw.circle(screen, crater_color, (self.moon_pos[0] - 10, self.moon_pos[1] - 15), 8)
-                pygame.draw.circle(screen, crater_color, (self.moon_pos[0] + 10, self.moon_pos[1] - 5), 6)
-                pygame.draw.circle(screen, crater_color, (self.moon_pos[0] - 15, self.moon_pos[1] + 5), 7)
-                pygame.draw.circle(screen, crater_color, (self.moon_pos[0] + 5, self.moon_pos[1] + 10), 9)
-            
-            for i in range(3):
-                glow_alpha = max(0, min(255, moon_alpha - i*70))
-                if glow_alpha > 10:
-                    glow_surface = pygame.Surface((60 + i*10, 60 + i*10), pygame.SRCALPHA)
-                    pygame.draw.circle(glow_surface, (220, 220, 240, glow_alpha), 
-                                    (30 + i*5, 30 + i*5), 30 + i*5)
-                    screen.blit(glow_surface, (self.moon_pos[0] - 30 - i*5, self.moon_pos[1] - 30 - i*5))
-        
-        for mountain in self.mountains:
+        for body, alpha, (x, y) in (('sun', sun_alpha, self.sun_pos), ('moon', moon_alpha, self.moon_pos)):
+            if alpha > 0:
+                sprite, (offset_x, offset_y) = celestial_sprites.get(body, alpha)
+                surface.blit(sprite, (x + offset_x, y + offset_y))
+    
+    def draw_sky(self, surface, mode_transition=0.0, scale=1.0):
+        fill_rows(surface, sky_rows(mode_transition), scale)
+        self.star_field.render(surface, mode_transition, scale)
+    
+    def render_mountains(self, surface, mountains, mode_transition, dx, dy, scale=1.0):
+        for mountain in sorted(mountains, key=lambda m: m['base'][1]):
             mx, mh, mw = mountain['base']
-            mountain_detail = mountain['detail']
+            if mx + mw//2 + dx < 0 or mx - mw//2 + dx >= CHUNK_WIDTH:
+                continue
             
             shadow_r = int(100 * (1 - mode_transition) + 40 * mode_transition)
             shadow_g = int(70 * (1 - mode_transition) + 30 * mode_transition)
             shadow_b = int(30 * (1 - mode_transition) + 20 * mode_transition)
             shadow_color = (shadow_r, shadow_g, shadow_b)
             
-            pygame.draw.polygon(screen, shadow_color, mountain_detail)
+            pygame.draw.polygon(surface, shadow_color, scale_points(mountain['detail'], dx, dy, scale))
             
-            for i in range(0, mh, 3):
-                ratio = i / mh
-                
-                if ratio > 0.7:
-                    day_r = 139 - int(ratio * 30)
-                    day_g = 69 - int(ratio * 20)
-                    day_b = 19
-                else:
-                    green_intensity = int(120 + (1-ratio) * 80)
-                    brown_intensity = int(30 + ratio * 70)
-                    day_r = brown_intensity
-                    day_g = green_intensity
-                    day_b = 30
-                
-                if ratio > 0.7:
-                    night_r = 50 - int(ratio * 15)
-                    night_g = 50 - int(ratio * 25)
-                    night_b = 70 - int(ratio * 30)
-                else:
-                    night_r = 30 + int(ratio * 20)
-                    night_g = 40 + int(ratio * 10)
-                    night_b = 60
-                
-                r = int(day_r * (1 - mode_transition) + night_r * mode_transition)
-                g = int(day_g * (1 - mode_transition) + night_g * mode_transition)
-                b = int(day_b * (1 - mode_transition) + night_b * mode_transition)
-                color = (r, g, b)
-                
-                height_points = []
-                for x, y in mountain_detail:
-                    if y <= SCREEN_HEIGHT - FLOOR_HEIGHT - i:
-                        height_points.append((x, SCREEN_HEIGHT - FLOOR_HEIGHT - i))
-                
-                if len(height_points) >= 2:
-                    for j in range(len(height_points) - 1):
-                        pygame.draw.line(screen, color, height_points[j], height_points[j+1])
+            step = quality['mountain_step']
+            colors = mountain_band_colors(np.arange(0, mh, step) / mh, mode_transition)
+            fill_mountain_bands(surface, mountain['detail'], mh, step, colors, dx, dy, scale)
             
-            for tx, ty, size in mountain['texture']:
+            for tx, ty, size in mountain['texture'] if quality['rock_textures'] else ():
                 rock_color = (shadow_r - 20, shadow_g - 10, shadow_b - 5)
-                pygame.draw.circle(screen, rock_color, (tx, ty), size)
+                pygame.draw.circle(surface, rock_color, ((tx + dx) * scale, (ty + dy) * scale), size * scale)
                 highlight_color = (shadow_r + 30, shadow_g + 20, shadow_b + 10)
-                pygame.draw.circle(screen, highlight_color, (tx - size//3, ty - size//3), size//2)
+                pygame.draw.circle(surface, highlight_color, ((tx + dx - size//3) * scale, (ty + dy - size//3) * scale),
+                                   size//2 * scale)
             
             if mountain['has_snow'] and len(mountain['snow']) >= 3:
-                snow_points = mountain['snow'] + [(mountain['snow'][-1][0], mountain['snow'][0][1])]
+                snow_points = scale_points(mountain['snow'], dx, dy, scale)
+                snow_points.append((snow_points[-1][0], snow_points[0][1]))
                 
                 day_snow = (250, 250, 255)
                 night_snow = (200, 210, 255)
@@ -358,42 +1119,26 @@ class Background:
                 g = int(day_snow[1] * (1 - mode_transition) + night_snow[1] * mode_transition)
                 b = int(day_snow[2] * (1 - mode_transition) + night_snow[2] * mode_transition)
                 
-                pygame.draw.polygon(screen, (r, g, b), snow_points)
+                pygame.draw.polygon(surface, (r, g, b), snow_points)
             
             for tree_x, tree_y, tree_height, tree_width in mountain['trees']:
-                self.draw_tree(tree_x, tree_y, tree_height, tree_width, mode_transition)
-        
-        for tree_x, tree_y, tree_height, tree_width in self.trees:
-            self.draw_tree(tree_x, tree_y, tree_height, tree_width, mode_transition)
-        
+                self.draw_tree(surface, tree_x + dx, tree_y + dy, tree_height, tree_width, mode_transition, scale)
+    
+    def render_trees(self, surface, trees, mode_transition, dx, dy, scale=1.0):
+        for tree_x, tree_y, tree_height, tree_width in trees:
+            self.draw_tree(surface, tree_x + dx, tree_y + dy, tree_height, tree_width, mode_transition, scale)
+    
+    def draw_clouds(self, mode_transition=0.0):
         cloud_alpha = max(50, int(255 * (1 - mode_transition*0.7)))
+        commands = []
         
-        for i in range(len(self.cloud_positions)):
-            x, y = self.cloud_positions[i]
-            size = self.cloud_sizes[i]
-            
-            cloud_color = (255, 255, 255, cloud_alpha)
-            shadow_color = (200, 200, 200, cloud_alpha)
-            
-            shadow_offset = 5
-            
-            shadow_surface = pygame.Surface((60 * size, 30 * size), pygame.SRCALPHA)
-            pygame.draw.ellipse(shadow_surface, shadow_color, (0, 0, 60 * size, 30 * size))
-            screen.blit(shadow_surface, (x + shadow_offset, y + shadow_offset))
-            
-            main_surface = pygame.Surface((60 * size, 30 * size), pygame.SRCALPHA)
-            pygame.draw.ellipse(main_surface, cloud_color, (0, 0, 60 * size, 30 * size))
-            screen.blit(main_surface, (x, y))
-            
-            top_surface = pygame.Surface((40 * size, 25 * size), pygame.SRCALPHA)
-            pygame.draw.ellipse(top_surface, cloud_color, (0, 0, 40 * size, 25 * size))
-            screen.blit(top_surface, (x + 20 * size, y - 10 * size))
-            
-            side_surface = pygame.Surface((50 * size, 25 * size), pygame.SRCALPHA)
-            pygame.draw.ellipse(side_surface, cloud_color, (0, 0, 50 * size, 25 * size))
-            screen.blit(side_surface, (x - 20 * size, y - 5 * size))
+        for (x, y), size in zip(self.cloud_positions, self.cloud_sizes):
+            sprite, (offset_x, offset_y) = cloud_sprites.get(size, cloud_alpha)
+            commands.append((sprite, (x + offset_x, y + offset_y), None))
+        
+        render_queue.extend(LAYER_CLOUDS, commands)
     
-    def draw_tree(self, x, y, height, width, mode_transition):
+    def draw_tree(self, surface, x, y, height, width, mode_transition, scale=1.0):
         trunk_height = height * 0.4
         trunk_width = width * 0.3
         
@@ -405,7 +1150,8 @@ class Background:
         b = int(day_trunk[2] * (1 - mode_transition) + night_trunk[2] * mode_transition)
         
         trunk_color = (r, g, b)
-        pygame.draw.rect(screen, trunk_color, (x - trunk_width//2, y - trunk_height, trunk_width, trunk_height))
+        pygame.draw.rect(surface, trunk_color, ((x - trunk_width//2) * scale, (y - trunk_height) * scale,
+                                                trunk_width * scale, trunk_height * scale))
         
         tree_top_height = height * 0.6
         
@@ -429,66 +1175,171 @@ class Background:
                 (x + layer_width//2, y - trunk_height - offset)
             ]
             
-            pygame.draw.polygon(screen, leaf_color, points)
+            pygame.draw.polygon(surface, leaf_color, scale_points(points, 0, 0, scale))
     
-    def update(self):
+    def update(self, dt):
+        self.scroll += OBSTACLE_SPEED * dt
         for i in range(len(self.cloud_positions)):
-            self.cloud_positions[i][0] -= self.cloud_speeds[i]
+            self.cloud_positions[i][0] -= self.cloud_speeds[i] * dt
             if self.cloud_positions[i][0] + 100 < 0:
                 self.cloud_positions[i][0] = SCREEN_WIDTH
-                self.cloud_positions[i][1] = random.randint(20, SCREEN_HEIGHT//3)
+                self.cloud_positions[i][1] = self.cloud_random.randint(20, SCREEN_HEIGHT//3)
 
-def draw_floor(mode_transition=0.0):
-    for y in range(FLOOR_HEIGHT):
-        day_shade = 139 - int(y * 0.3)
-        day_color = (day_shade, day_shade//2, day_shade//3)
-        
-        night_shade = 50 - int(y * 0.2)
-        night_color = (night_shade, night_shade//3, night_shade//6)
-        
-        r = int(day_color[0] * (1 - mode_transition) + night_color[0] * mode_transition)
-        g = int(day_color[1] * (1 - mode_transition) + night_color[1] * mode_transition)
-        b = int(day_color[2] * (1 - mode_transition) + night_color[2] * mode_transition)
-        
-        pygame.draw.line(screen, (r, g, b), 
-                        (0, SCREEN_HEIGHT - FLOOR_HEIGHT + y), 
-                        (SCREEN_WIDTH, SCREEN_HEIGHT - FLOOR_HEIGHT + y))
+class FloorTexture(BakedSurfaces):
+    def __init__(self, rng, width=FLOOR_TILE_WIDTH):
+        super().__init__()
+        self.width = width
+        self.stones = [(i, j, rng.randint(130, 150), rng.randint(40, 55))
+                       for i in range(0, width, 30) for j in range(0, FLOOR_HEIGHT, 20)]
+        self.day_surface = None
+        self.night_surface = None
     
-    for i in range(0, SCREEN_WIDTH, 30):
-        for j in range(0, FLOOR_HEIGHT, 20):
-            day_shade = random.randint(130, 150)
+    def render(self, mode_transition, scale=1.0):
+        surface = pygame.Surface(scaled_size((self.width, FLOOR_HEIGHT), scale)).convert()
+        fill_rows(surface, floor_rows(mode_transition), scale)
+        
+        for i, j, day_shade, night_shade in self.stones:
             day_color = (day_shade, day_shade//2, day_shade//3)
-            
-            night_shade = random.randint(40, 55)
             night_color = (night_shade, night_shade//2, night_shade//5)
             
             r = int(day_color[0] * (1 - mode_transition) + night_color[0] * mode_transition)
             g = int(day_color[1] * (1 - mode_transition) + night_color[1] * mode_transition)
             b = int(day_color[2] * (1 - mode_transition) + night_color[2] * mode_transition)
             
-            pygame.draw.rect(screen, (r, g, b), 
-                           (i, SCREEN_HEIGHT - FLOOR_HEIGHT + j, 15, 10))
-    
-    day_grass = DAY_GRASS
-    night_grass = NIGHT_GRASS
-    r = int(day_grass[0] * (1 - mode_transition) + night_grass[0] * mode_transition)
-    g = int(day_grass[1] * (1 - mode_transition) + night_grass[1] * mode_transition)
-    b = int(day_grass[2] * (1 - mode_transition) + night_grass[2] * mode_transition)
-    
-    pygame.draw.rect(screen, (r, g, b), (0, SCREEN_HEIGHT - FLOOR_HEIGHT, SCREEN_WIDTH, 5))
-    
-    for i in range(0, SCREEN_WIDTH, 40):
-        shadow_r = int(0 * (1 - mode_transition) + 0 * mode_transition)
-        shadow_g = int(100 * (1 - mode_transition) + 40 * mode_transition)
-        shadow_b = int(0 * (1 - mode_transition) + 20 * mode_transition)
-        pygame.draw.ellipse(screen, (shadow_r, shadow_g, shadow_b), 
-                          (i+2, SCREEN_HEIGHT - FLOOR_HEIGHT + 3, 20, 7))
-        
-        tuft_r = int(0 * (1 - mode_transition) + 0 * mode_transition)
-        tuft_g = int(200 * (1 - mode_transition) + 80 * mode_transition)
-        tuft_b = int(0 * (1 - mode_transition) + 40 * mode_transition)
-        pygame.draw.ellipse(screen, (tuft_r, tuft_g, tuft_b), 
-                          (i, SCREEN_HEIGHT - FLOOR_HEIGHT, 20, 7))
+            pygame.draw.rect(surface, (r, g, b), (i * scale, j * scale, 15 * scale, 10 * scale))
+        
+        day_grass = DAY_GRASS
+        night_grass = NIGHT_GRASS
+        r = int(day_grass[0] * (1 - mode_transition) + night_grass[0] * mode_transition)
+        g = int(day_grass[1] * (1 - mode_transition) + night_grass[1] * mode_transition)
+        b = int(day_grass[2] * (1 - mode_transition) + night_grass[2] * mode_transition)
+        
+        pygame.draw.rect(surface, (r, g, b), (0, 0, surface.get_width(), 5 * scale))
+        
+        for i in range(0, self.width, 40):
+            shadow_r = int(0 * (1 - mode_transition) + 0 * mode_transition)
+            shadow_g = int(100 * (1 - mode_transition) + 40 * mode_transition)
+            shadow_b = int(0 * (1 - mode_transition) + 20 * mode_transition)
+            pygame.draw.ellipse(surface, (shadow_r, shadow_g, shadow_b),
+                                ((i+2) * scale, 3 * scale, 20 * scale, 7 * scale))
+            
+            tuft_r = int(0 * (1 - mode_transition) + 0 * mode_transition)
+            tuft_g = int(200 * (1 - mode_transition) + 80 * mode_transition)
+            tuft_b = int(0 * (1 - mode_transition) + 40 * mode_transition)
+            pygame.draw.ellipse(surface, (tuft_r, tuft_g, tuft_b), (i * scale, 0, 20 * scale, 7 * scale))
+        
+        native_scale[surface] = scale
+        return surface
+    
+    def bake(self, scale):
+        return self.render(0.0, scale), self.render(1.0, scale)
+    
+    def install(self, surfaces, scale):
+        self.day_surface, self.night_surface = surfaces
+        self.scale = scale
+    
+    def blit_tiled(self, texture, offset):
+        render_queue.extend(LAYER_FLOOR, [(texture, (x, SCREEN_HEIGHT - FLOOR_HEIGHT), None)
+                                          for x in range(-offset, SCREEN_WIDTH, self.width)])
+    
+    def draw(self, mode_transition=0.0, scroll=0.0):
+        self.refresh()
+        
+        offset = int(scroll) % self.width
+        if mode_transition <= 0:
+            self.blit_tiled(at_render_scale(self.day_surface), offset)
+        elif mode_transition >= 1:
+            self.night_surface.set_alpha(None)
+            self.blit_tiled(at_render_scale(self.night_surface), offset)
+        else:
+            self.blit_tiled(at_render_scale(self.day_surface), offset)
+            self.night_surface.set_alpha(int(255 * mode_transition))
+            self.blit_tiled(at_render_scale(self.night_surface), offset)
+
+class TextCache:
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+    
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+text_cache = TextCache()
+
+class GameOverPanel:
+    def __init__(self):
+        self.score = None
+        self.surface = None
+    
+    def render(self, score):
+        surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 128))
+        
+        shadow_offset = 10
+        pygame.draw.rect(surface, (20, 20, 20), 
+                      (SCREEN_WIDTH // 2 - 150 + shadow_offset, 
+                       SCREEN_HEIGHT // 2 - 60 + shadow_offset, 300, 120))
+        
+        pygame.draw.rect(surface, (70, 70, 70), 
+                      (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 300, 120))
+        pygame.draw.rect(surface, (100, 100, 100), 
+                      (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 300, 5))
+        pygame.draw.rect(surface, (50, 50, 50), 
+                      (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 5, 120))
+        pygame.draw.rect(surface, (30, 30, 30), 
+                      (SCREEN_WIDTH // 2 + 145, SCREEN_HEIGHT // 2 - 60, 5, 120))
+        pygame.draw.rect(surface, (40, 40, 40), 
+                      (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + 55, 300, 5))
+        
+        shadow_offset = 2
+        game_over_shadow = text_cache.render(font, 'Game Over!', BLACK)
+        restart_shadow = text_cache.render(font, 'Press R to restart', BLACK)
+        final_score_shadow = text_cache.render(font, f'Final Score: {score}', BLACK)
+        
+        surface.blit(game_over_shadow, 
+                  (SCREEN_WIDTH // 2 - game_over_shadow.get_width() // 2 + shadow_offset, 
+                   SCREEN_HEIGHT // 2 - 30 + shadow_offset))
+        surface.blit(restart_shadow, 
+                  (SCREEN_WIDTH // 2 - restart_shadow.get_width() // 2 + shadow_offset, 
+                   SCREEN_HEIGHT // 2 + 10 + shadow_offset))
+        surface.blit(final_score_shadow,
+                 (SCREEN_WIDTH // 2 - final_score_shadow.get_width() // 2,
+                  SCREEN_HEIGHT // 2 - 70 + shadow_offset))
+        
+        game_over_text = text_cache.render(font, 'Game Over!', WHITE)
+        restart_text = text_cache.render(font, 'Press R to restart', WHITE)
+        final_score = text_cache.render(font, f'Final Score: {score}', WHITE)
+        
+        surface.blit(game_over_text, 
+                  (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 
+                   SCREEN_HEIGHT // 2 - 30))
+        surface.blit(restart_text, 
+                  (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 
+                   SCREEN_HEIGHT // 2 + 10))
+        surface.blit(final_score,
+                 (SCREEN_WIDTH // 2 - final_score.get_width() // 2,
+                  SCREEN_HEIGHT // 2 - 70))
+        
+        return surface
+    
+    def draw(self, score):
+        if score != self.score:
+            self.surface = self.render(score)
+            self.score = score
+        render_queue.submit(LAYER_OVERLAY, self.surface, (0, 0))
+
+game_over_panel = GameOverPanel()
+
+profiler = FrameProfiler(1000 / FPS)
 
 def calculate_fps():
     global LAST_FRAME_TIME
@@ -497,150 +1348,342 @@ def calculate_fps():
     LAST_FRAME_TIME = current_time
     return int(1.0 / dt) if dt > 0 else 0
 
-def game():
-    bird = Bird()
-    obstacles = []
-    score = 0
-    game_over = False
-    last_obstacle = pygame.time.get_ticks() - OBSTACLE_FREQUENCY
-    background = Background()
-    
-    current_mode = DAY_MODE
-    mode_transition = 0.0
-    target_mode = DAY_MODE
-    last_toggle = 0
-    toggle_cooldown = 500
-    
-    running = True
-    while running:
-        clock.tick(FPS)
-        
-        current_time = pygame.time.get_ticks()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and not game_over:
-                    bird.jump()
-                if event.key == pygame.K_r and game_over:
-                    return game()
-                if event.key == pygame.K_n and current_time - last_toggle > toggle_cooldown:
-                    target_mode = NIGHT_MODE if target_mode == DAY_MODE else DAY_MODE
-                    last_toggle = current_time
-        
-        if target_mode == DAY_MODE and mode_transition > 0:
-            mode_transition = max(0, mode_transition - MODE_TRANSITION_SPEED)
-        elif target_mode == NIGHT_MODE and mode_transition < 1:
-            mode_transition = min(1, mode_transition + MODE_TRANSITION_SPEED)
-        
-        if not game_over and current_time - last_obstacle > OBSTACLE_FREQUENCY:
-            obstacles.append(Obstacle(SCREEN_WIDTH))
-            last_obstacle = current_time
-        
-        if not game_over:
-            bird.update()
-            background.update()
-            
-            for obstacle in obstacles:
-                obstacle.update()
-                
-                if obstacle.collide(bird):
-                    game_over = True
-                
-                if not obstacle.passed and obstacle.x + obstacle.width < bird.x:
-                    obstacle.passed = True
-                    score += 1
+class Game:
+    def __init__(self, seed=None, fps=FPS, dirty_rects=DIRTY_RECTS, profile_output=None, collider=None,
+                 obstacle_interval=OBSTACLE_INTERVAL, record_output=None, title_screen=False,
+                 adaptive_quality=ADAPTIVE_QUALITY, quality_tier=0, telemetry_output=None):
+        init()
+        if collider is None and PIXEL_COLLISION:
+            collider = pixel_collider()
+        self.fps = fps
+        self.dirty_rects = dirty_rects
+        self.profile_output = profile_output
+        self.collider = collider
+        self.obstacle_interval = obstacle_interval
+        self.profiler = profiler
+        self.record_output = record_output
+        self.recorder = Recorder(pixel_collision=isinstance(collider, MaskCollider))
+        self.telemetry = TelemetryWriter(telemetry_output) if telemetry_output else None
+        self.frame_times = FrameHistogram()
+        self.time_ms = 0
+        self.running = True
+        
+        self.world = World(seed, self.collider, self.obstacle_interval)
+        self.background = None
+        self.next_background = None
+        self.regenerating = False
+        self.dirty = None
+        if self.dirty_rects:
+            self.dirty = DirtyRects(pygame.Rect(0, SCROLL_TOP, SCREEN_WIDTH, SCREEN_HEIGHT - SCROLL_TOP))
+        self.start_run()
+        
+        self.start_requested = False
+        if title_screen:
+            self.state = TITLE
+            self.regenerate_background()
+        else:
+            self.background = Background()
+            self.background.bake()
         
-        obstacles = [obstacle for obstacle in obstacles if obstacle.x > -obstacle.width]
+        self.quality = QualityController(1000 / (fps or FPS)) if adaptive_quality else None
+        self.quality_tier = None
+        self.set_quality(quality_tier)
+    
+    def set_quality(self, tier):
+        global quality, view, render_scale
+        previous = quality
+        quality = QUALITY_TIERS[tier]
+        self.quality_tier = tier
+        if self.quality is not None:
+            self.quality.tier = tier
+        
+        render_scale = display_scale * quality['scale']
+        if render_scale == 1:
+            view = frame
+        elif not isinstance(view, ScaledView) or view.scale != render_scale:
+            view = ScaledView(render_scale)
+        
+        baked = ('glows', 'mountain_step', 'rock_textures')
+        if self.background is not None and any(quality[key] != previous[key] for key in baked):
+            self.background.invalidate()
+        if self.dirty is not None:
+            self.dirty.invalidate()
+    
+    def restart(self, seed=None):
+        self.finish_run()
+        self.world.reset(seed)
+        if self.dirty is not None:
+            self.dirty.invalidate()
+        if REGENERATE_BACKGROUND:
+            self.regenerate_background()
+        self.start_run()
+    
+    def start_run(self):
+        self.recorder.start(self.world.seed)
+        self.state = PLAYING
+        
+        self.current_mode = DAY_MODE
+        self.mode_transition = 0.0
+        self.target_mode = DAY_MODE
+        self.last_toggle = 0
+        self.toggle_cooldown = 500
+        
+        self.accumulator = 0.0
+        self.jump = False
+    
+    def finish_run(self):
+        self.recorder.finish(self.world)
+        if self.telemetry is None:
+            return
         
-        day_sky = DAY_SKY
-        night_sky = NIGHT_SKY
-        sky_r = int(day_sky[0] * (1 - mode_transition) + night_sky[0] * mode_transition)
-        sky_g = int(day_sky[1] * (1 - mode_transition) + night_sky[1] * mode_transition)
-        sky_b = int(day_sky[2] * (1 - mode_transition) + night_sky[2] * mode_transition)
+        world = self.world
+        recording = self.recorder.current
+        record = {'type': 'run', 'time': round(time.time(), 3), 'seed': world.seed, 'score': world.score,
+                  'ticks': world.tick, 'game_over': world.game_over, 'jumps': len(recording.jumps),
+                  'toggles': len(recording.toggles), 'quality': quality['name'],
+                  'frame_ms': self.frame_times.snapshot()}
+        death = world.death_obstacle() if world.game_over else None
+        if death is not None:
+            record['obstacle'], obstacle = death
+            record['gap_y'] = obstacle.height
+        self.telemetry.push(record)
+        self.frame_times.reset()
+    
+    def regenerate_background(self):
+        if self.regenerating:
+            return
+        self.regenerating = True
+        
+        def build():
+            try:
+                background = Background()
+                background.bake()
+            except Exception:
+                traceback.print_exc()
+                self.regenerating = False
+                return
+            self.next_background = background
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    def swap_background(self):
+        self.background, self.next_background = self.next_background, None
+        self.regenerating = False
+        if self.dirty is not None:
+            self.dirty.invalidate()
+    
+    def resize(self, size):
+        set_window(size)
+        self.set_quality(self.quality_tier)
+    
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
         
-        screen.fill((sky_r, sky_g, sky_b))
+        if event.type == pygame.VIDEORESIZE:
+            self.resize(event.size)
         
-        background.draw(mode_transition)
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE and self.state == PLAYING:
+                self.jump = True
+            if event.key == pygame.K_SPACE and self.state == TITLE:
+                self.start_requested = True
+            if event.key == pygame.K_r and self.state == GAME_OVER:
+                self.state = RESTARTING
+            if event.key == pygame.K_n and self.time_ms - self.last_toggle > self.toggle_cooldown:
+                self.toggle_mode()
+            if event.key == pygame.K_F3:
+                self.profiler.toggle()
+            if event.key == pygame.K_F4:
+                self.profiler.dump(self.profile_output or PROFILE_DUMP_PATH)
+    
+    def toggle_mode(self):
+        self.target_mode = NIGHT_MODE if self.target_mode == DAY_MODE else DAY_MODE
+        self.last_toggle = self.time_ms
+        self.recorder.toggle(self.world.tick)
+    
+    def update(self, frame_time):
+        if self.state == RESTARTING:
+            self.restart()
+        if self.next_background is not None:
+            self.swap_background()
+            startup.setdefault('background_ms', (time.perf_counter() - STARTED) * 1000)
+        elif self.background is None and not self.regenerating:
+            self.background = Background()
+            self.background.bake()
+        if self.state == TITLE and self.start_requested and self.background is not None:
+            self.state = PLAYING
+            self.accumulator = 0.0
         
-        for obstacle in obstacles:
-            obstacle.draw()
+        if self.target_mode == DAY_MODE and self.mode_transition > 0:
+            self.mode_transition = max(0, self.mode_transition - MODE_TRANSITION_SPEED * frame_time)
+        elif self.target_mode == NIGHT_MODE and self.mode_transition < 1:
+            self.mode_transition = min(1, self.mode_transition + MODE_TRANSITION_SPEED * frame_time)
         
-        draw_floor(mode_transition)
+        if self.state != PLAYING:
+            return
         
-        bird.draw()
+        self.background.update(frame_time)
         
+        while self.accumulator >= TIMESTEP:
+            if self.jump:
+                self.recorder.jump(self.world.tick)
+            alive = self.world.step(self.jump)
+            self.jump = False
+            self.accumulator -= TIMESTEP
+            if not alive:
+                self.state = GAME_OVER
+                break
+    
+    def draw(self):
+        world = self.world
+        dirty = self.dirty
+        mode_transition = self.mode_transition
+        alpha = 1.0 if self.state != PLAYING else self.accumulator / TIMESTEP
+        score = world.score
+        
+        drawn = None
+        if self.background is not None:
+            self.background.backdrop.refresh()
+            drawn = (mode_transition, self.background.backdrop.baked)
+        steady = (dirty is not None and not dirty.full and self.state == PLAYING and view is screen
+                  and (mode_transition <= 0 or mode_transition >= 1) and dirty.drawn == drawn)
+        
+        if self.background is None:
+            view.fill(DAY_SKY, (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+            rects = []
+        elif steady:
+            rects = self.background.draw(mode_transition, dirty.previous)
+        else:
+            rects = self.background.draw(mode_transition)
+            if dirty is not None:
+                dirty.invalidate()
+        self.profiler.mark('background')
+        
+        for obstacle in world.obstacles:
+            draw_obstacle(obstacle, alpha)
+        self.profiler.mark('obstacles')
+        
+        scroll = interpolate(world.tick - 1, world.tick, alpha) * OBSTACLE_SPEED / TICK_RATE
+        if self.background is not None:
+            self.background.draw_floor(mode_transition, scroll)
+        self.profiler.mark('floor')
+        
+        draw_bird(world.bird, alpha)
+        self.profiler.mark('bird')
+        
+        rects.extend(render_queue.flush(view, WORLD_LAYERS))
+        if view is not frame:
+            view.present(frame)
+        if view is not screen and dirty is not None:
+            dirty.invalidate()
+        self.profiler.mark('render')
+        
+        if self.state == TITLE:
+            self.draw_title()
+        else:
+            self.draw_hud(score)
+        
+        if self.state == GAME_OVER:
+            game_over_panel.draw(score)
+        
+        rects.extend(render_queue.flush(hud, SCREEN_LAYERS))
+        rects.append(self.profiler.draw(screen, profiler_font, text_cache))
+        self.profiler.mark('hud')
+        
+        if dirty is not None:
+            dirty.drawn = drawn
+            dirty.add(rects)
+            dirty.update()
+        else:
+            pygame.display.update()
+        self.profiler.mark('display')
+        
+        if 'first_frame_ms' not in startup:
+            startup['first_frame_ms'] = (time.perf_counter() - STARTED) * 1000
+    
+    def draw_title(self):
+        title = text_cache.render(font, 'Flappy Bird 3D', WHITE)
+        title_shadow = text_cache.render(font, 'Flappy Bird 3D', (20, 20, 20))
+        prompt = 'Loading...' if self.background is None else 'Press SPACE to start'
+        prompt_text = text_cache.render(hint_font, prompt, WHITE)
+        
+        x = SCREEN_WIDTH // 2 - title.get_width() // 2
+        render_queue.extend(LAYER_HUD, [
+            (title_shadow, (x + 2, SCREEN_HEIGHT // 4 + 2), None),
+            (title, (x, SCREEN_HEIGHT // 4), None),
+            (prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, SCREEN_HEIGHT // 4 + 50), None),
+        ])
+    
+    def draw_hud(self, score):
         shadow_offset = 2
-        score_shadow = font.render(f'Score: {score}', True, (20, 20, 20))
-        screen.blit(score_shadow, (10 + shadow_offset, 10 + shadow_offset))
+        score_shadow = text_cache.render(font, f'Score: {score}', (20, 20, 20))
+        score_text = text_cache.render(font, f'Score: {score}', WHITE)
+        hint_text = text_cache.render(hint_font, 'Press N to toggle day/night', WHITE)
         
-        score_text = font.render(f'Score: {score}', True, WHITE)
-        screen.blit(score_text, (10, 10))
+        current_fps = calculate_fps()
+        fps_text = text_cache.render(fps_font, f'FPS: {current_fps}', WHITE)
+        quality_text = text_cache.render(hint_font, f"Quality: {quality['name']}", WHITE)
         
-        hint_font = pygame.font.SysFont('Arial', 18)
-        hint_text = hint_font.render('Press N to toggle day/night', True, WHITE)
-        screen.blit(hint_text, (10, 40))
+        render_queue.extend(LAYER_HUD, [
+            (score_shadow, (10 + shadow_offset, 10 + shadow_offset), None),
+            (score_text, (10, 10), None),
+            (hint_text, (10, 40), None),
+            (fps_text, (SCREEN_WIDTH - 80, 10), None),
+            (quality_text, (SCREEN_WIDTH - quality_text.get_width() - 10, 34), None),
+        ])
+    
+    def frame(self, frame_time, events=None):
+        self.profiler.begin_frame()
         
-        fps = calculate_fps()
-        fps_text = pygame.font.SysFont('Arial', 20).render(f'FPS: {fps}', True, WHITE)
-        screen.blit(fps_text, (SCREEN_WIDTH - 80, 10))
+        frame_time = min(frame_time, MAX_FRAME_TIME)
+        self.time_ms += frame_time * 1000
+        self.accumulator += frame_time
         
-        if game_over:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 128))
-            screen.blit(overlay, (0, 0))
-            
-            shadow_offset = 10
-            pygame.draw.rect(screen, (20, 20, 20), 
-                          (SCREEN_WIDTH // 2 - 150 + shadow_offset, 
-                           SCREEN_HEIGHT // 2 - 60 + shadow_offset, 300, 120))
-            
-            pygame.draw.rect(screen, (70, 70, 70), 
-                          (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 300, 120))
-            pygame.draw.rect(screen, (100, 100, 100), 
-                          (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 300, 5))
-            pygame.draw.rect(screen, (50, 50, 50), 
-                          (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 - 60, 5, 120))
-            pygame.draw.rect(screen, (30, 30, 30), 
-                          (SCREEN_WIDTH // 2 + 145, SCREEN_HEIGHT // 2 - 60, 5, 120))
-            pygame.draw.rect(screen, (40, 40, 40), 
-                          (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + 55, 300, 5))
-            
-            shadow_offset = 2
-            game_over_shadow = font.render('Game Over!', True, BLACK)
-            restart_shadow = font.render('Press R to restart', True, BLACK)
-            final_score_shadow = font.render(f'Final Score: {score}', True, BLACK)
-            
-            screen.blit(game_over_shadow, 
-                      (SCREEN_WIDTH // 2 - game_over_shadow.get_width() // 2 + shadow_offset, 
-                       SCREEN_HEIGHT // 2 - 30 + shadow_offset))
-            screen.blit(restart_shadow, 
-                      (SCREEN_WIDTH // 2 - restart_shadow.get_width() // 2 + shadow_offset, 
-                       SCREEN_HEIGHT // 2 + 10 + shadow_offset))
-            screen.blit(final_score_shadow,
-                     (SCREEN_WIDTH // 2 - final_score_shadow.get_width() // 2,
-                      SCREEN_HEIGHT // 2 - 70 + shadow_offset))
-            
-            game_over_text = font.render('Game Over!', True, WHITE)
-            restart_text = font.render('Press R to restart', True, WHITE)
-            final_score = font.render(f'Final Score: {score}', True, WHITE)
-            
-            screen.blit(game_over_text, 
-                      (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 
-                       SCREEN_HEIGHT // 2 - 30))
-            screen.blit(restart_text, 
-                      (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 
-                       SCREEN_HEIGHT // 2 + 10))
-            screen.blit(final_score,
-                     (SCREEN_WIDTH // 2 - final_score.get_width() // 2,
-                      SCREEN_HEIGHT // 2 - 70))
-        
-        pygame.display.update()
+        for event in pygame.event.get() if events is None else events:
+            self.handle_event(event)
+        self.profiler.mark('events')
+        
+        self.update(frame_time)
+        self.profiler.mark('simulation')
+        
+        self.draw()
+        self.profiler.end_frame()
+        
+        frame_ms = self.profiler.window[-1][0] / 1e6
+        if self.telemetry is not None:
+            self.frame_times.add(frame_ms)
+        if self.quality is not None:
+            tier = self.quality.observe(frame_ms)
+            if tier is not None:
+                self.set_quality(tier)
     
+    def run(self):
+        last_frame = time.perf_counter()
+        
+        while self.running:
+            clock.tick(self.fps)
+            
+            now = time.perf_counter()
+            self.frame(now - last_frame)
+            last_frame = now
+        
+        if self.profile_output:
+            self.profiler.dump(self.profile_output)
+        self.finish_run()
+        if self.record_output:
+            self.recorder.save(self.record_output)
+        if self.telemetry is not None:
+            self.telemetry.close()
+
+def game(seed=None, fps=FPS, dirty_rects=DIRTY_RECTS, profile_output=None, record_output=None,
+         telemetry_output=TELEMETRY_DIR):
+    Game(seed, fps, dirty_rects, profile_output, record_output=record_output, title_screen=TITLE_SCREEN,
+         telemetry_output=telemetry_output).run()
     pygame.quit()
     sys.exit()
 
+startup['import_ms'] = (time.perf_counter() - STARTED) * 1000
+
 if __name__ == "__main__":
     game()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import csv
+import json
+import time
+from collections import deque
+
+STAGES = ('events', 'simulation', 'background', 'obstacles', 'floor', 'bird', 'render', 'hud', 'display')
+STAGE_COLORS = {
+    'events': (200, 200, 200),
+    'simulation': (255, 200, 0),
+    'background': (80, 160, 255),
+    'obstacles': (255, 80, 80),
+    'floor': (160, 100, 40),
+    'bird': (255, 140, 0),
+    'render': (0, 200, 200),
+    'hud': (180, 80, 255),
+    'display': (80, 220, 120),
+}
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class FrameProfiler:
+    def __init__(self, budget_ms=1000 / 60, window=600, session_limit=200000, stages=STAGES):
+        self.budget_ns = int(budget_ms * 1e6)
+        self.stages = stages
+        self.stage_index = {stage: i for i, stage in enumerate(stages)}
+        self.window = deque(maxlen=window)
+        self.session = deque(maxlen=session_limit)
+        self.frame_count = 0
+        self.missed = 0
+        self.max_frame_ns = 0
+        self.visible = False
+        self.current = None
+        self.frame_start = 0
+        self.last_mark = 0
+    
+    def begin_frame(self):
+        self.current = [0] * len(self.stages)
+        self.frame_start = self.last_mark = time.perf_counter_ns()
+    
+    def mark(self, stage):
+        now = time.perf_counter_ns()
+        self.current[self.stage_index[stage]] += now - self.last_mark
+        self.last_mark = now
+    
+    def end_frame(self):
+        total = self.last_mark - self.frame_start
+        record = (total, *self.current)
+        self.window.append(record)
+        self.session.append(record)
+        self.frame_count += 1
+        self.max_frame_ns = max(self.max_frame_ns, total)
+        if total > self.budget_ns:
+            self.missed += 1
+    
+    def toggle(self):
+        self.visible = not self.visible
+    
+    def summary(self):
+        totals = sorted(record[0] for record in self.window)
+        count = len(self.window) or 1
+        stage_means = [sum(record[i + 1] for record in self.window) / count for i in range(len(self.stages))]
+        return {
+            'frames': self.frame_count,
+            'missed': self.missed,
+            'budget_ms': self.budget_ns / 1e6,
+            'p50_ms': percentile(totals, 0.50) / 1e6,
+            'p95_ms': percentile(totals, 0.95) / 1e6,
+            'p99_ms': percentile(totals, 0.99) / 1e6,
+            'max_ms': self.max_frame_ns / 1e6,
+            'stages_ms': {stage: mean / 1e6 for stage, mean in zip(self.stages, stage_means)},
+        }
+    
+    def dump(self, path):
+        columns = ('frame_ns',) + tuple(f'{stage}_ns' for stage in self.stages)
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(self.session)
+        else:
+            with open(path, 'w') as f:
+                json.dump({
+                    'summary': self.summary(),
+                    'columns': columns,
+                    'frames': list(self.session),
+                }, f)
+        return path
+    
+    def draw(self, surface, font, text_cache):
+        import pygame
+        
+        if not self.visible or not self.window:
+            return pygame.Rect(0, 0, 0, 0)
+        
+        summary = self.summary()
+        width = 190
+        bar_height = 10
+        panel = pygame.Rect(surface.get_width() - width - 10, 40, width,
+                            12 + len(self.stages) * (bar_height + 4) + 60)
+        
+        overlay = pygame.Surface(panel.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        surface.blit(overlay, panel)
+        
+        scale = (width - 96) / max(self.budget_ns / 1e6, 1e-6)
+        y = panel.y + 6
+        for stage in self.stages:
+            stage_ms = summary['stages_ms'][stage]
+            label = text_cache.render(font, f'{stage[:5]} {stage_ms:4.1f}', (255, 255, 255))
+            surface.blit(label, (panel.x + 6, y - 4))
+            bar_width = min(width - 96, int(stage_ms * scale))
+            pygame.draw.rect(surface, STAGE_COLORS.get(stage, (255, 255, 255)),
+                             (panel.x + 84, y, max(1, bar_width), bar_height))
+            y += bar_height + 4
+        
+        budget_x = panel.x + 84 + (width - 96)
+        pygame.draw.line(surface, (255, 60, 60), (budget_x, panel.y + 4), (budget_x, y))
+        
+        lines = [
+            f"p50 {summary['p50_ms']:.1f}  p95 {summary['p95_ms']:.1f}",
+            f"p99 {summary['p99_ms']:.1f}  max {summary['max_ms']:.1f}",
+            f"missed {summary['missed']}/{summary['frames']}",
+        ]
+        for line in lines:
+            surface.blit(text_cache.render(font, line, (255, 255, 255)), (panel.x + 6, y + 2))
+            y += 20
+        
+        return panel
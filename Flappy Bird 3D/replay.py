@@ -0,0 +1,251 @@
+import argparse
+import bisect
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+from simulation import TICK_RATE, TIMESTEP, World
+
+MAGIC = b'FBRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBI')
+RUN_HEADER = struct.Struct('<QIIB')
+SNAPSHOT_INTERVAL = 600
+RECORDING_LIMIT = 1000
+GAME_OVER_FRAMES = 90
+GAME_OVER_FLAG = 1
+PIXEL_COLLISION_FLAG = 2
+
+def encode_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, offset
+
+def encode_ticks(ticks):
+    out = bytearray()
+    encode_varint(out, len(ticks))
+    previous = 0
+    for tick in ticks:
+        encode_varint(out, tick - previous)
+        previous = tick
+    return out
+
+def decode_ticks(data, offset):
+    count, offset = decode_varint(data, offset)
+    ticks = array('I')
+    tick = 0
+    for _ in range(count):
+        delta, offset = decode_varint(data, offset)
+        tick += delta
+        ticks.append(tick)
+    return ticks, offset
+
+class Recording:
+    def __init__(self, seed, jumps=None, toggles=None, end_tick=0, score=0, game_over=False, pixel_collision=False):
+        self.seed = seed
+        self.jumps = jumps if jumps is not None else array('I')
+        self.toggles = toggles if toggles is not None else array('I')
+        self.end_tick = end_tick
+        self.score = score
+        self.game_over = game_over
+        self.pixel_collision = pixel_collision
+    
+    def finish(self, world):
+        self.end_tick = world.tick
+        self.score = world.score
+        self.game_over = world.game_over
+    
+    def encode(self):
+        flags = (GAME_OVER_FLAG if self.game_over else 0) | (PIXEL_COLLISION_FLAG if self.pixel_collision else 0)
+        return (RUN_HEADER.pack(self.seed, self.end_tick, self.score, flags)
+                + encode_ticks(self.jumps) + encode_ticks(self.toggles))
+    
+    @classmethod
+    def decode(cls, data, offset=0):
+        seed, end_tick, score, flags = RUN_HEADER.unpack_from(data, offset)
+        jumps, offset = decode_ticks(data, offset + RUN_HEADER.size)
+        toggles, offset = decode_ticks(data, offset)
+        return cls(seed, jumps, toggles, end_tick, score, bool(flags & GAME_OVER_FLAG),
+                   bool(flags & PIXEL_COLLISION_FLAG)), offset
+
+class Recorder:
+    def __init__(self, limit=RECORDING_LIMIT, pixel_collision=False):
+        self.runs = deque(maxlen=limit)
+        self.pixel_collision = pixel_collision
+        self.current = None
+    
+    def start(self, seed):
+        self.current = Recording(seed, pixel_collision=self.pixel_collision)
+        self.runs.append(self.current)
+    
+    def jump(self, tick):
+        self.current.jumps.append(tick)
+    
+    def toggle(self, tick):
+        self.current.toggles.append(tick)
+    
+    def finish(self, world):
+        if self.current is not None:
+            self.current.finish(world)
+    
+    def save(self, path):
+        save(path, self.runs)
+        return path
+
+def save(path, runs):
+    runs = list(runs)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(runs)))
+        for run in runs:
+            f.write(run.encode())
+
+def load(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} replay file')
+    runs = []
+    offset = HEADER.size
+    for _ in range(count):
+        run, offset = Recording.decode(data, offset)
+        runs.append(run)
+    return runs
+
+def recording_collider(recording):
+    if not recording.pixel_collision:
+        return None
+    import flappy_bird
+    
+    flappy_bird.init(headless=True)
+    return flappy_bird.pixel_collider()
+
+class Replayer:
+    def __init__(self, recording, snapshot_interval=SNAPSHOT_INTERVAL, collider=None):
+        self.recording = recording
+        self.jumps = set(recording.jumps)
+        self.snapshot_interval = snapshot_interval
+        self.world = World(recording.seed, collider or recording_collider(recording))
+        self.snapshot_ticks = [0]
+        self.snapshots = [self.world.snapshot()]
+    
+    @property
+    def done(self):
+        return self.world.game_over or self.world.tick >= self.recording.end_tick
+    
+    def step(self):
+        world = self.world
+        world.step(world.tick in self.jumps)
+        if self.snapshot_interval and world.tick % self.snapshot_interval == 0 and world.tick > self.snapshot_ticks[-1]:
+            self.snapshot_ticks.append(world.tick)
+            self.snapshots.append(world.snapshot())
+    
+    def run_to(self, tick=None):
+        tick = self.recording.end_tick if tick is None else tick
+        while self.world.tick < tick and not self.world.game_over:
+            self.step()
+        return self.world
+    
+    def seek(self, tick):
+        index = bisect.bisect_right(self.snapshot_ticks, tick) - 1
+        if self.snapshot_ticks[index] > self.world.tick or tick < self.world.tick:
+            self.world.restore(self.snapshots[index])
+        return self.run_to(tick)
+    
+    def verify(self):
+        world = self.run_to()
+        recording = self.recording
+        return (world.score == recording.score and world.tick == recording.end_tick
+                and world.game_over == recording.game_over)
+
+def verify(runs, snapshot_interval=0):
+    results = []
+    for recording in runs:
+        replayer = Replayer(recording, snapshot_interval)
+        results.append((replayer.verify(), replayer.world))
+    return results
+
+def play(runs, start_tick=0, fps=None):
+    import pygame
+    import flappy_bird
+    
+    game = flappy_bird.Game(runs[0].seed, fps or flappy_bird.FPS)
+    for index, recording in enumerate(runs):
+        replayer = Replayer(recording)
+        if index == 0 and start_tick:
+            replayer.seek(start_tick)
+        game.restart(recording.seed)
+        game.world = replayer.world
+        toggles = list(recording.toggles)
+        
+        held = 0
+        while game.running and held < GAME_OVER_FRAMES:
+            flappy_bird.clock.tick(game.fps)
+            world = game.world
+            while toggles and toggles[0] <= world.tick:
+                toggles.pop(0)
+                game.toggle_mode()
+            game.jump = not replayer.done and world.tick in replayer.jumps
+            if replayer.done:
+                game.accumulator = 0.0
+                held += 1
+            
+            events = [event for event in pygame.event.get() if event.type == pygame.QUIT
+                      or (event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4))]
+            game.frame(0.0 if replayer.done else TIMESTEP, events)
+        
+        if not game.running:
+            break
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify or play back recorded runs.')
+    parser.add_argument('command', choices=('verify', 'play', 'info'))
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--run', type=int, help='only use this run from each file')
+    parser.add_argument('--start-tick', type=int, default=0, help='seek to this tick before playing')
+    parser.add_argument('--fps', type=int)
+    args = parser.parse_args()
+    
+    runs = []
+    for path in args.paths:
+        file_runs = load(path)
+        runs.extend(file_runs if args.run is None else file_runs[args.run:args.run + 1])
+    
+    if args.command == 'info':
+        for index, run in enumerate(runs):
+            print(f'{index:4d} seed {run.seed} ticks {run.end_tick} score {run.score} '
+                  f"game_over {run.game_over} collision {'pixel' if run.pixel_collision else 'rect'} "
+                  f'jumps {len(run.jumps)} toggles {len(run.toggles)}')
+    elif args.command == 'play':
+        play(runs, args.start_tick, args.fps)
+    else:
+        start = time.perf_counter()
+        results = verify(runs)
+        elapsed = time.perf_counter() - start
+        failed = [index for index, (ok, world) in enumerate(results) if not ok]
+        for index in failed:
+            run, world = runs[index], results[index][1]
+            print(f'run {index}: recorded score {run.score} at tick {run.end_tick}, '
+                  f'replayed score {world.score} at tick {world.tick}')
+        ticks = sum(world.tick for ok, world in results)
+        print(f'{len(runs) - len(failed)}/{len(runs)} runs verified, {ticks} ticks in {elapsed:.3f}s '
+              f'({ticks / max(elapsed, 1e-9):,.0f} ticks/s, {ticks / max(elapsed, 1e-9) / TICK_RATE:,.0f}x real time)')
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import random
+from array import array
+
+from collision import RectCollider
+
+SCREEN_WIDTH = 400
+SCREEN_HEIGHT = 600
+GRAVITY = 900
+BIRD_JUMP = -300
+OBSTACLE_GAP = 150
+OBSTACLE_FREQUENCY = 1500
+OBSTACLE_SPEED = 180
+OBSTACLE_WIDTH = 60
+FLOOR_HEIGHT = 100
+BIRD_SIZE = 20
+DINO_SIZE = (50, 50)
+BIRD_MIN_ROTATION = -30
+BIRD_MAX_ROTATION = 70
+TICK_RATE = 60
+TIMESTEP = 1 / TICK_RATE
+OBSTACLE_INTERVAL = OBSTACLE_FREQUENCY * TICK_RATE // 1000
+
+class Bird:
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.x = SCREEN_WIDTH // 3
+        self.y = SCREEN_HEIGHT // 2
+        self.prev_y = self.y
+        self.velocity = 0
+        self.size = BIRD_SIZE
+        self.rotation = 0
+        self.prev_rotation = self.rotation
+        self.shadow_offset = 8
+    
+    def update(self):
+        self.prev_y = self.y
+        self.prev_rotation = self.rotation
+        self.velocity += GRAVITY / TICK_RATE
+        self.y += self.velocity / TICK_RATE
+        
+        if self.y + self.size > SCREEN_HEIGHT - FLOOR_HEIGHT:
+            self.y = SCREEN_HEIGHT - FLOOR_HEIGHT - self.size
+            self.velocity = 0
+        
+        self.rotation = max(BIRD_MIN_ROTATION, min(self.velocity / TICK_RATE * 3, BIRD_MAX_ROTATION))
+    
+    def jump(self):
+        self.velocity = BIRD_JUMP
+    
+    def snapshot(self):
+        return (self.y, self.prev_y, self.velocity, self.rotation, self.prev_rotation)
+    
+    def restore(self, state):
+        self.y, self.prev_y, self.velocity, self.rotation, self.prev_rotation = state
+    
+    def get_mask(self):
+        return (int(self.x - self.size//2), int(self.y - self.size//2),
+                self.size, self.size)
+
+class Obstacle:
+    __slots__ = ('x', 'prev_x', 'height', 'passed', 'width', 'dino_size',
+                 'top_dinos', 'bottom_dinos', 'cells', 'hitboxes')
+    
+    def __init__(self, x, rng=random):
+        self.width = OBSTACLE_WIDTH
+        self.dino_size = DINO_SIZE
+        self.top_dinos = array('h')
+        self.bottom_dinos = array('h')
+        self.cells = []
+        self.hitboxes = []
+        self.reset(x, rng)
+    
+    def reset(self, x, rng=random):
+        self.x = x
+        self.prev_x = x
+        self.height = rng.randint(100, SCREEN_HEIGHT - FLOOR_HEIGHT - OBSTACLE_GAP - 100)
+        self.passed = False
+        
+        del self.top_dinos[:]
+        del self.bottom_dinos[:]
+        
+        for i in range(0, self.height, self.dino_size[1]):
+            if rng.random() > 0.5:
+                self.top_dinos.append(i)
+        
+        bottom_space = SCREEN_HEIGHT - FLOOR_HEIGHT - self.height - OBSTACLE_GAP
+        for i in range(0, bottom_space, self.dino_size[1]):
+            if rng.random() > 0.5:
+                self.bottom_dinos.append(i)
+        
+        self.build_hitboxes()
+    
+    def build_hitboxes(self):
+        width, height = self.dino_size
+        bottom_y_start = self.height + OBSTACLE_GAP
+        cells = self.cells
+        hitboxes = self.hitboxes
+        del cells[:]
+        del hitboxes[:]
+        
+        for y_pos in self.top_dinos:
+            cells.append((0, y_pos, width, height))
+        for y_offset in self.bottom_dinos:
+            cells.append((0, bottom_y_start + y_offset, width, height))
+        
+        for _, y_pos, _, _ in cells:
+            if hitboxes and hitboxes[-1][1] + hitboxes[-1][3] == y_pos:
+                hitboxes[-1] = (0, hitboxes[-1][1], width, hitboxes[-1][3] + height)
+            else:
+                hitboxes.append((0, y_pos, width, height))
+    
+    def update(self):
+        self.prev_x = self.x
+        self.x -= OBSTACLE_SPEED / TICK_RATE
+    
+    def snapshot(self):
+        return (self.x, self.prev_x, self.height, self.passed,
+                self.top_dinos.tobytes(), self.bottom_dinos.tobytes())
+    
+    def restore(self, state):
+        self.x, self.prev_x, self.height, self.passed, top_dinos, bottom_dinos = state
+        del self.top_dinos[:]
+        del self.bottom_dinos[:]
+        self.top_dinos.frombytes(top_dinos)
+        self.bottom_dinos.frombytes(bottom_dinos)
+        self.build_hitboxes()
+
+class ObstaclePool:
+    def __init__(self):
+        self.free = []
+    
+    def take(self):
+        if self.free:
+            return self.free.pop()
+        return Obstacle(0, random.Random(0))
+    
+    def acquire(self, x, rng=random):
+        if self.free:
+            obstacle = self.free.pop()
+            obstacle.reset(x, rng)
+            return obstacle
+        return Obstacle(x, rng)
+    
+    def release(self, obstacle):
+        self.free.append(obstacle)
+
+class World:
+    def __init__(self, seed=None, collider=None, obstacle_interval=OBSTACLE_INTERVAL):
+        self.collider = collider or RectCollider()
+        self.obstacle_interval = obstacle_interval
+        self.pool = ObstaclePool()
+        self.obstacles = []
+        self.bird = Bird()
+        self.rng = random.Random()
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng.seed(self.seed)
+        self.bird.reset()
+        for obstacle in self.obstacles:
+            self.pool.release(obstacle)
+        del self.obstacles[:]
+        self.score = 0
+        self.tick = 0
+        self.game_over = False
+        self.last_obstacle = -self.obstacle_interval
+    
+    def step(self, jump=False):
+        if self.game_over:
+            return False
+        
+        if jump:
+            self.bird.jump()
+        
+        if self.tick - self.last_obstacle >= self.obstacle_interval:
+            self.obstacles.append(self.pool.acquire(SCREEN_WIDTH, self.rng))
+            self.last_obstacle = self.tick
+        
+        self.bird.update()
+        
+        for obstacle in self.obstacles:
+            obstacle.update()
+            
+            if not obstacle.passed and obstacle.x + obstacle.width < self.bird.x:
+                obstacle.passed = True
+                self.score += 1
+        
+        if self.collider.collide(self.bird, self.obstacles):
+            self.game_over = True
+        
+        expired = 0
+        for obstacle in self.obstacles:
+            if obstacle.x > -obstacle.width:
+                break
+            self.pool.release(obstacle)
+            expired += 1
+        if expired:
+            del self.obstacles[:expired]
+        self.tick += 1
+        return not self.game_over
+    
+    def death_obstacle(self):
+        collider = self.collider
+        rect = collider.bounds(self.bird)
+        for obstacle in collider.candidates(rect, self.obstacles):
+            if collider.hit(self.bird, rect, obstacle):
+                spawned = self.last_obstacle // self.obstacle_interval + 1
+                return spawned - len(self.obstacles) + self.obstacles.index(obstacle), obstacle
+        return None
+    
+    def snapshot(self):
+        return (self.seed, self.rng.getstate(), self.bird.snapshot(),
+                [obstacle.snapshot() for obstacle in self.obstacles],
+                self.score, self.tick, self.game_over, self.last_obstacle)
+    
+    def restore(self, state):
+        self.seed, rng_state, bird, obstacles, self.score, self.tick, self.game_over, self.last_obstacle = state
+        self.rng.setstate(rng_state)
+        self.bird.restore(bird)
+        
+        for obstacle in self.obstacles:
+            self.pool.release(obstacle)
+        del self.obstacles[:]
+        for obstacle_state in obstacles:
+            obstacle = self.pool.take()
+            obstacle.restore(obstacle_state)
+            self.obstacles.append(obstacle)
+    
+    def run(self, inputs, max_ticks=None):
+        for jump in inputs:
+            if self.game_over or (max_ticks is not None and self.tick >= max_ticks):
+                break
+            self.step(jump)
+        return self.score
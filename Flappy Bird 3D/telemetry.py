@@ -0,0 +1,269 @@
+import argparse
+import bisect
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from simulation import TICK_RATE
+
+TELEMETRY_DIR = 'telemetry'
+QUEUE_SIZE = 1024
+BATCH_SIZE = 64
+MAX_FILE_BYTES = 1 << 20
+MAX_FILES = 32
+STALE_SESSION_SECONDS = 24 * 60 * 60
+TAIL_BYTES = 4096
+CLOSE_TIMEOUT = 2.0
+FRAME_BUCKETS_MS = (2, 4, 8, 12, 16, 20, 25, 33, 50, 100, 250)
+FILE_PATTERN = re.compile(r'\d{8}-\d{6}-\d+-\d{3}\.jsonl')
+
+def telemetry_files(directory):
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if FILE_PATTERN.fullmatch(name)]
+
+def session_of(path):
+    return os.path.basename(path).rsplit('-', 1)[0]
+
+def last_record(path):
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - TAIL_BYTES))
+            lines = f.read().splitlines()
+        return json.loads(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
+
+def session_finished(path, now):
+    try:
+        if os.path.getmtime(path) < now - STALE_SESSION_SECONDS:
+            return True
+    except OSError:
+        return False
+    record = last_record(path)
+    return isinstance(record, dict) and record.get('type') == 'close'
+
+def bucket_label(edge):
+    return 'inf' if edge is None else f'{edge:g}'
+
+def bucket_edge(label):
+    return float(label)
+
+class FrameHistogram:
+    def __init__(self, edges=FRAME_BUCKETS_MS):
+        self.edges = edges
+        self.labels = [bucket_label(edge) for edge in edges] + [bucket_label(None)]
+        self.counts = [0] * len(self.labels)
+    
+    def add(self, ms):
+        self.counts[bisect.bisect_left(self.edges, ms)] += 1
+    
+    def reset(self):
+        self.counts = [0] * len(self.labels)
+    
+    def snapshot(self):
+        return {label: count for label, count in zip(self.labels, self.counts) if count}
+
+class TelemetryWriter:
+    def __init__(self, directory=TELEMETRY_DIR, max_bytes=MAX_FILE_BYTES, max_files=MAX_FILES,
+                 queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.batch_size = batch_size
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.part = 0
+        self.file = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def push(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+    
+    def close(self, timeout=CLOSE_TIMEOUT):
+        if self.closed:
+            return
+        self.closed = True
+        if not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+    
+    def path(self, part):
+        return os.path.join(self.directory, f'{self.session}-{part:03d}.jsonl')
+    
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.file = open(self.path(self.part), 'a')
+        self.part += 1
+        self.prune()
+    
+    def prune(self):
+        paths = telemetry_files(self.directory)
+        excess = len(paths) - self.max_files
+        if excess <= 0:
+            return
+        
+        last = {session_of(path): path for path in paths}
+        now = time.time()
+        for path in paths:
+            if excess <= 0:
+                break
+            if path == last[session_of(path)] and not session_finished(path, now):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            excess -= 1
+    
+    def write(self, records):
+        if self.file is None or self.file.tell() >= self.max_bytes:
+            if self.file is not None:
+                self.file.close()
+            self.open()
+        self.file.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records))
+        self.file.flush()
+        self.written += len(records)
+    
+    def run(self):
+        self.write([{'type': 'session', 'session': self.session, 'time': round(time.time(), 3)}])
+        while True:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if batch[-1] is not None:
+                self.write(batch)
+                continue
+            
+            self.write(batch[:-1] + [{'type': 'close', 'session': self.session, 'time': round(time.time(), 3),
+                                      'written': self.written + len(batch), 'dropped': self.dropped}])
+            self.file.close()
+            return
+
+def read(paths):
+    records = []
+    corrupt = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    corrupt += 1
+    return records, corrupt
+
+def expand(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(telemetry_files(path))
+        else:
+            files.append(path)
+    return files
+
+def histogram_percentile(histogram, fraction):
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    seen = 0
+    for label in sorted(histogram, key=bucket_edge):
+        seen += histogram[label]
+        if seen >= fraction * total:
+            return label
+    return label
+
+def summarize(records):
+    runs = [record for record in records if record.get('type') == 'run']
+    sessions = {record['session'] for record in records if record.get('type') == 'session'}
+    closed = [record for record in records if record.get('type') == 'close']
+    
+    frames = Counter()
+    for run in runs:
+        frames.update(run.get('frame_ms', {}))
+    scores = sorted(run['score'] for run in runs)
+    return {
+        'sessions': len(sessions),
+        'unclosed_sessions': len(sessions - {record['session'] for record in closed}),
+        'dropped': sum(record['dropped'] for record in closed),
+        'runs': len(runs),
+        'deaths': sum(1 for run in runs if run['game_over']),
+        'score_mean': sum(scores) / len(scores) if scores else 0,
+        'score_median': scores[len(scores) // 2] if scores else 0,
+        'score_max': scores[-1] if scores else 0,
+        'ticks': sum(run['ticks'] for run in runs),
+        'jumps': sum(run['jumps'] for run in runs),
+        'toggles': sum(run['toggles'] for run in runs),
+        'death_obstacles': Counter(run['obstacle'] for run in runs if 'obstacle' in run).most_common(),
+        'quality': Counter(run['quality'] for run in runs).most_common(),
+        'frames': sum(frames.values()),
+        'frame_ms': dict(sorted(frames.items(), key=lambda item: bucket_edge(item[0]))),
+    }
+
+def report(summary):
+    runs = summary['runs'] or 1
+    print(f"{summary['sessions']} sessions ({summary['unclosed_sessions']} not closed cleanly), "
+          f"{summary['runs']} runs, {summary['dropped']} dropped records")
+    print(f"score mean {summary['score_mean']:.2f} median {summary['score_median']} max {summary['score_max']}, "
+          f"{summary['deaths']} deaths")
+    print(f"{summary['ticks'] / runs / TICK_RATE:.1f}s per run, {summary['jumps'] / runs:.1f} jumps, "
+          f"{summary['toggles'] / runs:.2f} day/night toggles")
+    if summary['death_obstacles']:
+        print('deadliest obstacles ' + '  '.join(f'#{obstacle} x{count}'
+                                                 for obstacle, count in summary['death_obstacles'][:5]))
+    if summary['quality']:
+        print('quality at run end ' + '  '.join(f'{name} x{count}' for name, count in summary['quality']))
+    
+    frames = summary['frames']
+    if frames:
+        histogram = summary['frame_ms']
+        print(f"{frames} frames, p50 <= {histogram_percentile(histogram, 0.50)} ms, "
+              f"p95 <= {histogram_percentile(histogram, 0.95)} ms, p99 <= {histogram_percentile(histogram, 0.99)} ms")
+        for label, count in histogram.items():
+            print(f'  <= {label:>4} ms {count:9d} {count / frames:7.2%}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate session telemetry written by the game.')
+    parser.add_argument('paths', nargs='*', default=[TELEMETRY_DIR], help='telemetry directories or .jsonl files')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+    
+    files = expand(args.paths)
+    if not files:
+        print(f"no telemetry files in {', '.join(args.paths)}")
+        sys.exit(1)
+    records, corrupt = read(files)
+    summary = summarize(records)
+    summary['files'] = len(files)
+    summary['corrupt_lines'] = corrupt
+    
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f'{len(files)} files, {len(records)} records, {corrupt} unreadable lines')
+        report(summary)
+
+if __name__ == "__main__":
+    main()
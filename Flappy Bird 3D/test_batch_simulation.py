@@ -0,0 +1,25 @@
+import numpy as np
+
+from batch_simulation import BatchWorld
+from simulation import World
+
+BIRDS = 120
+TICKS = 2000
+JUMP_RATE = 0.07
+
+def test_batch_matches_scalar_world():
+    for seed in (0, 1, 7):
+        rng = np.random.default_rng(seed)
+        jumps = rng.random((TICKS, BIRDS)) < JUMP_RATE
+        batch = BatchWorld(BIRDS, seed)
+        alive = np.zeros((TICKS, BIRDS), dtype=bool)
+        for tick in range(TICKS):
+            alive[tick] = batch.step(jumps[tick])
+        
+        for bird in range(BIRDS):
+            world = World(seed)
+            for tick in range(TICKS):
+                world.step(bool(jumps[tick, bird]))
+                assert (not world.game_over) == alive[tick, bird], (seed, bird, tick)
+            assert world.score == batch.score[bird], (seed, bird)
+            assert world.tick == batch.ticks[bird], (seed, bird)
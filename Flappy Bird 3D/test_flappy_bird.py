@@ -0,0 +1,121 @@
+import random
+import time
+
+import pytest
+
+import flappy_bird
+from replay import load, verify
+from simulation import TIMESTEP
+
+@pytest.fixture(scope='module', autouse=True)
+def display():
+    flappy_bird.init(headless=True)
+
+def test_merge_rects_joins_near_duplicates():
+    merged = flappy_bird.merge_rects([(0, 0, 50, 50), (5, 0, 50, 50), (200, 200, 0, 10)])
+    assert [tuple(rect) for rect in merged] == [(0, 0, 55, 50)]
+
+def test_merge_rects_keeps_wasteful_unions_apart():
+    rects = [(0, 0, 100, 10), (90, 0, 10, 100), (300, 300, 20, 20)]
+    merged = flappy_bird.merge_rects(rects)
+    assert sorted(tuple(rect) for rect in merged) == sorted(rects)
+
+def test_dirty_rects_update_band_and_sky(monkeypatch):
+    updates = []
+    monkeypatch.setattr(flappy_bird.pygame.display, 'update', lambda *args: updates.append(args))
+    band = flappy_bird.pygame.Rect(0, 200, 400, 400)
+    dirty = flappy_bird.DirtyRects(band)
+    
+    dirty.add([flappy_bird.pygame.Rect(10, 10, 40, 40), flappy_bird.pygame.Rect(100, 180, 50, 50)])
+    dirty.update()
+    assert updates.pop() == ()
+    
+    dirty.add([flappy_bird.pygame.Rect(12, 10, 40, 40), flappy_bird.pygame.Rect(0, 300, 400, 100)])
+    dirty.update()
+    band_rect, *sky_rects = updates.pop()[0]
+    assert band_rect == band
+    assert sorted(tuple(rect) for rect in sky_rects) == [(10, 10, 42, 40), (100, 180, 50, 20)]
+    
+    dirty.add([flappy_bird.pygame.Rect(0, 0, 400, 190)])
+    dirty.update()
+    assert updates.pop() == ()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_failed_chunk_is_retried_after_invalidate():
+    broken = {5}
+    def generate(index):
+        if index in broken:
+            raise ValueError(index)
+        return []
+    
+    streamer = flappy_bird.ChunkStreamer(generate, lambda *args: None, 80, 1.0)
+    assert streamer.get(5) is None
+    wait_for(lambda: not streamer.pending)
+    assert streamer.failed == {5}
+    assert streamer.get(5) is None and not streamer.pending
+    
+    broken.clear()
+    streamer.invalidate()
+    assert streamer.get(5) is None and not streamer.failed
+    wait_for(lambda: not streamer.pending)
+    assert streamer.get(5) is not None
+
+def test_pixel_collision_runs_verify(tmp_path):
+    rng = random.Random(0)
+    game = flappy_bird.Game(0, collider=flappy_bird.pixel_collider(), adaptive_quality=False)
+    space = flappy_bird.pygame.event.Event(flappy_bird.pygame.KEYDOWN, key=flappy_bird.pygame.K_SPACE)
+    for seed in (1, 2, 3):
+        while game.state != flappy_bird.GAME_OVER and game.world.tick < 1500:
+            game.frame(TIMESTEP, [space] if rng.random() < 0.07 else [])
+        game.restart(seed)
+    
+    path = game.recorder.save(str(tmp_path / 'runs.fbr'))
+    runs = load(path)[:-1]
+    assert all(run.pixel_collision for run in runs) and any(run.game_over for run in runs)
+    assert all(ok for ok, world in verify(runs))
+
+def test_title_screen_recovers_from_failed_background_build(monkeypatch):
+    background = flappy_bird.Background
+    
+    class BrokenBackground(background):
+        def bake(self):
+            monkeypatch.setattr(flappy_bird, 'Background', background)
+            raise RuntimeError('bake failed')
+    
+    monkeypatch.setattr(flappy_bird, 'Background', BrokenBackground)
+    game = flappy_bird.Game(0, title_screen=True, adaptive_quality=False)
+    wait_for(lambda: not game.regenerating)
+    space = flappy_bird.pygame.event.Event(flappy_bird.pygame.KEYDOWN, key=flappy_bird.pygame.K_SPACE)
+    game.frame(TIMESTEP, [space])
+    assert game.background is not None and game.state == flappy_bird.PLAYING
+
+def feed(controller, frame_ms, frames):
+    changes = [controller.observe(frame_ms) for _ in range(frames)]
+    return [(index + 1, tier) for index, tier in enumerate(changes) if tier is not None]
+
+def test_quality_steps_down_and_backs_off_stepping_up():
+    controller = flappy_bird.QualityController(16.0, cooldown=120, window=90, stable=600)
+    assert feed(controller, 20.0, 120) == [(120, 1)]
+    assert feed(controller, 5.0, 120) == [(120, 0)]
+    assert feed(controller, 20.0, 120) == [(120, 1)]
+    assert controller.up_delay == 240
+    assert feed(controller, 5.0, 240) == [(240, 0)]
+    
+    assert feed(controller, 20.0, 120) == [(120, 1)]
+    assert feed(controller, 5.0, 480) == [(480, 0)]
+    assert feed(controller, 20.0, 120) == [(120, 1)]
+    assert controller.up_delay == 960
+    assert feed(controller, 5.0, 600) == [(600, 0)]
+    assert controller.up_delay == 120
+
+def test_quality_resets_up_delay_after_a_stable_period():
+    controller = flappy_bird.QualityController(16.0, cooldown=120, window=90, stable=600)
+    controller.tier = 1
+    controller.up_delay = 7680
+    assert feed(controller, 5.0, 600) == [(600, 0)]
+    assert controller.up_delay == 120
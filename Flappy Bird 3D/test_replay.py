@@ -0,0 +1,56 @@
+import random
+from array import array
+
+from replay import Recording, decode_ticks, decode_varint, encode_ticks, encode_varint, load, save, verify
+from simulation import World
+
+def test_varint_round_trip():
+    values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 32 - 1, 2 ** 64 - 1]
+    out = bytearray()
+    for value in values:
+        encode_varint(out, value)
+    offset = 0
+    for value in values:
+        decoded, offset = decode_varint(out, offset)
+        assert decoded == value
+    assert offset == len(out)
+
+def test_ticks_round_trip():
+    rng = random.Random(3)
+    ticks = sorted(rng.sample(range(100000), 500))
+    data = encode_ticks(ticks) + encode_ticks([])
+    decoded, offset = decode_ticks(data, 0)
+    assert list(decoded) == ticks
+    empty, offset = decode_ticks(data, offset)
+    assert list(empty) == [] and offset == len(data)
+
+def test_header_flags_round_trip():
+    for game_over in (False, True):
+        for pixel_collision in (False, True):
+            run = Recording(9, end_tick=40, score=2, game_over=game_over, pixel_collision=pixel_collision)
+            copy, offset = Recording.decode(run.encode())
+            assert (copy.game_over, copy.pixel_collision) == (game_over, pixel_collision)
+
+def play(seed, rate=0.07, max_ticks=5000):
+    rng = random.Random(seed)
+    world = World(seed)
+    recording = Recording(seed)
+    while not world.game_over and world.tick < max_ticks:
+        jump = rng.random() < rate
+        if jump:
+            recording.jumps.append(world.tick)
+        world.step(jump)
+    recording.toggles = array('I', [5, 90, 91])
+    recording.finish(world)
+    return recording
+
+def test_recordings_round_trip_and_verify(tmp_path):
+    runs = [play(seed) for seed in (0, 1, 2 ** 40, 2 ** 64 - 1)]
+    path = str(tmp_path / 'runs.fbr')
+    save(path, runs)
+    loaded = load(path)
+    
+    for run, copy in zip(runs, loaded):
+        assert (copy.seed, copy.end_tick, copy.score, copy.game_over) == (run.seed, run.end_tick, run.score, run.game_over)
+        assert list(copy.jumps) == list(run.jumps) and list(copy.toggles) == list(run.toggles)
+    assert all(ok for ok, world in verify(loaded))
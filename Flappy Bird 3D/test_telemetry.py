@@ -0,0 +1,37 @@
+import json
+import os
+import time
+
+from telemetry import STALE_SESSION_SECONDS, TelemetryWriter, expand
+
+CLOSE = json.dumps({'type': 'close'}) + '\n'
+
+def test_prune_keeps_foreign_files(tmp_path):
+    closed = [f'20240101-0000{second:02d}-42-000.jsonl' for second in range(5)]
+    foreign = ['notes.jsonl', 'export-20240101.jsonl', '20240101-000000-42-000.jsonl.bak']
+    for name in closed + foreign:
+        (tmp_path / name).write_text(CLOSE)
+    
+    writer = TelemetryWriter(str(tmp_path), max_files=2)
+    writer.close()
+    
+    names = set(os.listdir(tmp_path))
+    assert set(foreign) <= names
+    assert closed[0] not in names and closed[-1] in names
+    assert len([name for name in names if name not in foreign]) == 2
+    assert all(os.path.basename(path) not in foreign for path in expand([str(tmp_path)]))
+
+def test_prune_keeps_open_files_of_live_sessions(tmp_path):
+    live = [f'20240101-000000-7-{part:03d}.jsonl' for part in range(3)]
+    for name in live:
+        (tmp_path / name).write_text('{"type":"session"}\n')
+    crashed = tmp_path / '20240101-000001-8-000.jsonl'
+    crashed.write_text('{"type":"session"}\n')
+    stale = time.time() - STALE_SESSION_SECONDS - 60
+    os.utime(crashed, (stale, stale))
+    
+    writer = TelemetryWriter(str(tmp_path), max_files=1)
+    writer.close()
+    
+    names = set(os.listdir(tmp_path))
+    assert names == {live[-1], os.path.basename(writer.path(0))}